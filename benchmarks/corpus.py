@@ -0,0 +1,182 @@
+"""Careers-page corpus for the benchmarks: recorded from the HTTP cache or synthetic.
+
+A corpus is a list of Site objects, each a root path plus a {path: html} map
+served by the fixture server on its own port. ``record`` exports the pages of
+a real crawl (http_cache.sqlite) into a directory the benchmarks can replay:
+
+    python -m benchmarks.corpus record --cache http_cache.sqlite --out benchmarks/corpus
+"""
+import argparse
+import json
+import random
+import sqlite3
+import zlib
+from pathlib import Path
+from urllib.parse import urlparse
+
+MANIFEST = "manifest.json"
+
+class Site:
+    def __init__(self, name, root, pages):
+        self.name = name
+        self.root = root  # path (and query) of the careers landing page
+        self.pages = pages  # path_qs -> html
+
+    def job_pages(self):
+        from script import SITEMAP_JOB_URL_RE
+
+        return [(path, html) for path, html in self.pages.items() if SITEMAP_JOB_URL_RE.search(path)]
+
+def _path_qs(url):
+    parsed = urlparse(url)
+    return (parsed.path or "/") + (f"?{parsed.query}" if parsed.query else "")
+
+# -----------------------------
+# Synthetic corpus
+# -----------------------------
+SKILLS = ["python", "java", "go", "rust", "typescript", "javascript", "c++", "c#", "ruby", "php",
+          "django", "flask", "spring boot", "node js", "express", ".net", "rails", "laravel", "golang",
+          "react", "angular", "vue", "svelte", "next.js"]
+TITLES = ["Backend Engineer", "Frontend Engineer", "Full Stack Developer", "Site Reliability Engineer",
+          "Data Engineer", "Platform Engineer", "Mobile Developer", "Engineering Manager"]
+CITIES = ["Berlin, Germany", "Bengaluru, India", "Austin, TX", "London, UK", "Toronto, Canada", "Remote"]
+EXPERIENCE = ["{n}+ years of experience", "{n}-{m} years experience", "at least {n} years", "fresher welcome"]
+FILLER = ("Our team ships reliable services used by millions of customers. You will design, build and "
+          "operate systems, review code, mentor colleagues and work closely with product and design. ")
+
+NAV_PATHS = [f"/{w}" for w in ["about", "blog", "press", "investors", "contact", "privacy", "terms", "events"]]
+FOOTER_PATHS = [f"/footer/{i}" for i in range(40)]
+
+def _boilerplate(rng, site):
+    nav = "".join(f'<li><a href="{p}">{p[1:].title()}</a></li>' for p in NAV_PATHS)
+    footer = "".join(f'<a href="{p}">Link {p}</a> ' for p in FOOTER_PATHS)
+    script = "var cfg = " + json.dumps({"k%d" % i: rng.random() for i in range(200)}) + ";"
+    head = (f"<head><title>{site} careers</title><style>body{{font:14px sans-serif}}"
+            + ".x{color:red}" * 100 + f"</style><script>{script}</script></head>")
+    return head, f"<header><nav><ul>{nav}</ul></nav></header>", f"<footer>{footer}</footer>"
+
+def _description(rng):
+    skills = rng.sample(SKILLS, rng.randint(2, 6))
+    n = rng.randint(1, 9)
+    paragraphs = [FILLER * rng.randint(1, 3) for _ in range(rng.randint(3, 8))]
+    paragraphs.insert(1, f"We work with {', '.join(skills)}. "
+                         + rng.choice(EXPERIENCE).format(n=n, m=n + rng.randint(1, 4)) + ".")
+    if rng.random() < 0.4:
+        paragraphs.append(rng.choice(["This role is fully remote.", "Hybrid, 3 days in office.", "On-site only."]))
+    return paragraphs
+
+def _job_page(rng, site, job_id, variant):
+    head, header, footer = _boilerplate(rng, site)
+    title = rng.choice(TITLES)
+    city = rng.choice(CITIES)
+    paragraphs = _description(rng)
+    body = "".join(f"<p>{p}</p>" for p in paragraphs)
+    posted = f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+    if variant == 0:
+        # schema.org JobPosting, as many ATS-hosted pages embed
+        ld = json.dumps({"@context": "https://schema.org", "@type": "JobPosting", "title": title,
+                         "datePosted": posted, "description": body,
+                         "jobLocation": {"@type": "Place", "address": {"addressLocality": city}}})
+        head = head.replace("</head>", f'<script type="application/ld+json">{ld}</script></head>')
+        main = f"<main><h1>{title}</h1><div>{body}</div></main>"
+    elif variant == 1:
+        main = (f'<main><h1>{title}</h1><span class="location">{city}</span>'
+                f'<time datetime="{posted}">{posted}</time><div class="job-description">{body}</div></main>')
+    else:
+        # no hints at all: falls through to text-density scoring
+        main = f"<div><h1>{title}</h1><div><div>{body}</div></div><aside>Posted {posted} in {city}</aside></div>"
+    return f"<!DOCTYPE html><html>{head}<body>{header}{main}{footer}</body></html>"
+
+def synthetic_corpus(sites=8, jobs_per_site=40, seed=1234):
+    """Deterministic corpus of careers sites: a landing page linking to job pages of three layouts."""
+    rng = random.Random(seed)
+    corpus = []
+    for s in range(sites):
+        name = f"site{s}"
+        pages = {}
+        links = []
+        for j in range(jobs_per_site):
+            path = f"/jobs/{rng.choice(TITLES).lower().replace(' ', '-')}-{1000 + j}"
+            pages[path] = _job_page(rng, name, j, j % 3)
+            links.append(f'<li><a href="{path}">Opening {j}</a></li>')
+        head, header, footer = _boilerplate(rng, name)
+        for path in NAV_PATHS + FOOTER_PATHS:
+            # navigation pages the link heuristics pick up too; a real crawl pays for them
+            pages[path] = (f"<!DOCTYPE html><html>{head}<body>{header}<main><h1>{path}</h1>"
+                           f"<p>{FILLER * 3}</p></main>{footer}</body></html>")
+        pages["/careers"] = (f"<!DOCTYPE html><html>{head}<body>{header}<h1>Join us</h1>"
+                             f"<ul class='openings'>{''.join(links)}</ul>{footer}</body></html>")
+        corpus.append(Site(name, "/careers", pages))
+    return corpus
+
+# -----------------------------
+# Recorded corpus
+# -----------------------------
+def record_corpus(cache_path, out_dir, roots):
+    """Export cached pages under each root's host from an HttpCache file into out_dir."""
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    db = sqlite3.connect(str(cache_path))
+    by_host = {}
+    for key, body in db.execute("SELECT key, body FROM pages"):
+        kind, _, url = key.partition(":")
+        if kind in ("static", "rendered"):
+            # rendered copies win: they hold what the crawler actually parsed
+            pages = by_host.setdefault(urlparse(url).netloc, {})
+            if kind == "rendered" or _path_qs(url) not in pages:
+                pages[_path_qs(url)] = zlib.decompress(body).decode("utf-8")
+    db.close()
+    from script import canonicalize_url
+
+    manifest = []
+    for root in roots:
+        root = canonicalize_url(root)  # cache keys are canonical URLs
+        parsed = urlparse(root)
+        pages = by_host.get(parsed.netloc)
+        root_path = _path_qs(root)
+        if not pages or root_path not in pages:
+            continue
+        site_dir = out_dir / parsed.netloc
+        site_dir.mkdir(exist_ok=True)
+        files = {}
+        for i, (path, html) in enumerate(sorted(pages.items())):
+            # same-host absolute links become root-relative so they resolve against the fixture server
+            for prefix in (f"https://{parsed.netloc}", f"http://{parsed.netloc}"):
+                html = html.replace(prefix + "/", "/")
+            name = f"{i:05d}.html.z"
+            (site_dir / name).write_bytes(zlib.compress(html.encode("utf-8"), 9))
+            files[path] = f"{parsed.netloc}/{name}"
+        manifest.append({"name": parsed.netloc, "root": root_path, "pages": files})
+    (out_dir / MANIFEST).write_text(json.dumps({"sites": manifest}, indent=1))
+    return len(manifest)
+
+def load_corpus(path):
+    """Read a corpus directory written by record_corpus."""
+    path = Path(path)
+    manifest = json.loads((path / MANIFEST).read_text())
+    return [
+        Site(site["name"], site["root"],
+             {p: zlib.decompress((path / f).read_bytes()).decode("utf-8") for p, f in site["pages"].items()})
+        for site in manifest["sites"]
+    ]
+
+def get_corpus(path=None, sites=8, jobs_per_site=40):
+    """Recorded corpus at path when given, else the synthetic one."""
+    return load_corpus(path) if path else synthetic_corpus(sites, jobs_per_site)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+    rec = sub.add_parser("record", help="export pages from an HTTP cache into a corpus directory")
+    rec.add_argument("--cache", default="http_cache.sqlite")
+    rec.add_argument("--out", default="benchmarks/corpus")
+    rec.add_argument("roots", nargs="*", help="careers roots to keep (default: CAREERS_PAGES_LINKS)")
+    args = parser.parse_args()
+    roots = args.roots
+    if not roots:
+        import script
+        roots = script.CAREERS_PAGES_LINKS
+    print(f"Recorded {record_corpus(args.cache, args.out, roots)} sites into {args.out}")
+
+if __name__ == "__main__":
+    main()
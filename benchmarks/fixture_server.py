@@ -0,0 +1,209 @@
+"""Local stand-ins for the careers sites of a corpus and for ATS APIs, with injectable latency and errors.
+
+Every site is served on its own 127.0.0.1 port, so the crawler sees one host
+per site and its per-host limits behave as they would against real sites.
+AtsFixtureServer answers the Greenhouse, Lever, SmartRecruiters, Workday and
+Eightfold endpoints the adapters call, from payloads recorded in ats_payloads/.
+"""
+import asyncio
+import json
+import random
+from pathlib import Path
+
+from aiohttp import web
+
+ROBOTS_TXT = "User-agent: *\nAllow: /\n"
+ATS_PAYLOAD_DIR = Path(__file__).resolve().parent / "ats_payloads"
+
+class FixtureServer:
+    """Serves a corpus (list of corpus.Site) while running; use as ``async with FixtureServer(corpus)``.
+
+    Each response waits ``latency`` seconds (normally distributed with
+    ``jitter``); a fraction ``error_rate`` of page requests answers 503
+    instead. ``stats`` counts pages served, injected errors and misses.
+    """
+
+    def __init__(self, corpus, latency=0.0, jitter=0.0, error_rate=0.0, seed=0):
+        self.corpus = corpus
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.stats = {"pages": 0, "errors": 0, "not_found": 0}
+        self.roots = []
+        self._rng = random.Random(seed)
+        self._runners = []
+
+    async def _delay(self):
+        if self.latency or self.jitter:
+            await asyncio.sleep(max(0.0, self._rng.gauss(self.latency, self.jitter)))
+
+    def _injected_error(self):
+        if self.error_rate and self._rng.random() < self.error_rate:
+            self.stats["errors"] += 1
+            return web.Response(status=503, text="injected error")
+        return None
+
+    async def _handle(self, request):
+        site = request.app["site"]
+        await self._delay()
+        if request.path == "/robots.txt":
+            return web.Response(text=ROBOTS_TXT)
+        error = self._injected_error()
+        if error is not None:
+            return error
+        html = site.pages.get(request.path_qs) or site.pages.get(request.path)
+        if html is None:
+            self.stats["not_found"] += 1
+            raise web.HTTPNotFound()
+        self.stats["pages"] += 1
+        return web.Response(text=html, content_type="text/html")
+
+    async def __aenter__(self):
+        for site in self.corpus:
+            app = web.Application()
+            app["site"] = site
+            app.router.add_route("GET", "/{tail:.*}", self._handle)
+            runner = web.AppRunner(app, access_log=None)
+            await runner.setup()
+            tcp = web.TCPSite(runner, "127.0.0.1", 0)
+            await tcp.start()
+            port = runner.addresses[0][1]
+            self._runners.append(runner)
+            self.roots.append(f"http://127.0.0.1:{port}{site.root}")
+        return self
+
+    async def __aexit__(self, *exc):
+        for runner in self._runners:
+            await runner.cleanup()
+        self._runners = []
+
+# -----------------------------
+# ATS APIs
+# -----------------------------
+# where each vendor's recorded file keeps its postings and per-posting detail replies
+ATS_VENDORS = {
+    "greenhouse": (lambda raw: (raw["jobs"], {}), lambda post: str(post["id"]), None),
+    "lever": (lambda raw: (raw, {}), lambda post: post["id"], None),
+    "smartrecruiters": (lambda raw: (raw["postings"]["content"], raw["details"]), lambda post: post["id"],
+                        lambda post: post["id"]),
+    "workday": (lambda raw: (raw["jobs"]["jobPostings"], raw["details"]), lambda post: post["bulletFields"][0],
+                lambda post: post["externalPath"]),
+    "eightfold": (lambda raw: (raw["jobs"]["positions"], raw["details"]), lambda post: str(post["id"]),
+                  lambda post: str(post["id"])),
+}
+# careers URLs detect_ats() maps to each vendor's adapter
+ATS_BOARDS = {
+    "greenhouse": "https://boards.greenhouse.io/acme",
+    "lever": "https://jobs.lever.co/acme",
+    "smartrecruiters": "https://careers.smartrecruiters.com/Acme",
+    "workday": "https://acme.wd5.myworkdayjobs.com/en-US/External",
+    "eightfold": "https://acme.eightfold.ai/careers?domain=acme.com",
+}
+
+def load_ats_payloads(postings=None):
+    """{vendor: (postings, details)} from ats_payloads/, cycled to ``postings`` per vendor under fresh ids."""
+    payloads = {}
+    for vendor, (unpack, posting_id, detail_key) in ATS_VENDORS.items():
+        recorded, details = unpack(json.loads((ATS_PAYLOAD_DIR / f"{vendor}.json").read_text()))
+        out_posts, out_details = [], {}
+        for i in range(postings or len(recorded)):
+            post = recorded[i % len(recorded)]
+            detail = details.get(detail_key(post)) if detail_key else None
+            copy = i // len(recorded)
+            if copy:
+                # the id appears in urls and paths too; a numeric suffix keeps numeric ids numeric
+                old = posting_id(post)
+                post, detail = json.loads(json.dumps([post, detail]).replace(old, f"{old}{copy:04d}"))
+            out_posts.append(post)
+            if detail is not None:
+                out_details[detail_key(post)] = detail
+        payloads[vendor] = (out_posts, out_details)
+    return payloads
+
+class AtsFixtureServer(FixtureServer):
+    """Serves every ATS vendor's API on one port; use as ``async with AtsFixtureServer()``.
+
+    Point script.ATS_API_BASES at ``api_base`` for each vendor and crawl the
+    careers URLs in ``boards``. Any board or company name gets the same
+    postings, ``postings`` per vendor (default: the recorded ones), paged the
+    way each API pages them. Latency and error injection work as in
+    FixtureServer; ``stats["pages"]`` counts API replies.
+    """
+
+    def __init__(self, postings=None, latency=0.0, jitter=0.0, error_rate=0.0, seed=0):
+        super().__init__([], latency=latency, jitter=jitter, error_rate=error_rate, seed=seed)
+        self.payloads = load_ats_payloads(postings)
+        self.boards = dict(ATS_BOARDS)
+        self.api_base = None
+
+    def _reply(self, vendor, make):
+        async def handle(request):
+            await self._delay()
+            error = self._injected_error()
+            if error is not None:
+                return error
+            posts, details = self.payloads[vendor]
+            body = await make(request, posts, details)
+            if body is None:
+                self.stats["not_found"] += 1
+                raise web.HTTPNotFound()
+            self.stats["pages"] += 1
+            return web.json_response(body)
+        return handle
+
+    @staticmethod
+    def _window(request, start, size, default_size):
+        first = int(request.query.get(start, 0))
+        return first, first + int(request.query.get(size, default_size))
+
+    async def _greenhouse(self, request, posts, details):
+        return {"jobs": posts, "meta": {"total": len(posts)}}
+
+    async def _lever(self, request, posts, details):
+        first, last = self._window(request, "skip", "limit", len(posts))
+        return posts[first:last]
+
+    async def _smartrecruiters(self, request, posts, details):
+        first, last = self._window(request, "offset", "limit", 10)
+        return {"offset": first, "limit": last - first, "totalFound": len(posts), "content": posts[first:last]}
+
+    async def _smartrecruiters_detail(self, request, posts, details):
+        return details.get(request.match_info["id"])
+
+    async def _workday(self, request, posts, details):
+        query = await request.json()
+        first = query.get("offset", 0)
+        # like the real endpoint, only the first page reports the total
+        return {"total": len(posts) if first == 0 else 0, "jobPostings": posts[first:first + query.get("limit", 20)],
+                "facets": [], "userAuthenticated": False}
+
+    async def _workday_detail(self, request, posts, details):
+        return details.get("/job/" + request.match_info["tail"])
+
+    async def _eightfold(self, request, posts, details):
+        first, last = self._window(request, "start", "num", 10)
+        return {"positions": posts[first:last], "count": len(posts), "facets": {}, "debug": {}}
+
+    async def _eightfold_detail(self, request, posts, details):
+        return details.get(request.match_info["id"])
+
+    async def __aenter__(self):
+        app = web.Application()
+        routes = [
+            ("GET", "/v1/boards/{board}/jobs", "greenhouse", self._greenhouse),
+            ("GET", "/v0/postings/{company}", "lever", self._lever),
+            ("GET", "/v1/companies/{company}/postings", "smartrecruiters", self._smartrecruiters),
+            ("GET", "/v1/companies/{company}/postings/{id}", "smartrecruiters", self._smartrecruiters_detail),
+            ("POST", "/wday/cxs/{tenant}/{site}/jobs", "workday", self._workday),
+            ("GET", "/wday/cxs/{tenant}/{site}/job/{tail:.*}", "workday", self._workday_detail),
+            ("GET", "/api/apply/v2/jobs", "eightfold", self._eightfold),
+            ("GET", "/api/apply/v2/jobs/{id}", "eightfold", self._eightfold_detail),
+        ]
+        for method, path, vendor, make in routes:
+            app.router.add_route(method, path, self._reply(vendor, make))
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        await web.TCPSite(runner, "127.0.0.1", 0).start()
+        self._runners.append(runner)
+        self.api_base = f"http://127.0.0.1:{runner.addresses[0][1]}"
+        return self
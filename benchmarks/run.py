@@ -0,0 +1,165 @@
+"""Run the offline benchmarks and compare them with a saved baseline.
+
+    python -m benchmarks.run                      # all suites, synthetic corpus
+    python -m benchmarks.run --suite parse_job_page --corpus benchmarks/corpus
+    python -m benchmarks.run --save-baseline      # record benchmarks/baseline.json
+    python -m benchmarks.run --latency 0.05 --error-rate 0.02 --suite end_to_end
+
+Each suite runs in its own subprocess so its peak RSS is its own. Results are
+pages/s, ms/page (median of the repeats) and peak RSS; with a baseline, suites
+slower or larger than it by more than --tolerance are flagged.
+"""
+import argparse
+import atexit
+import json
+import logging
+import os
+import platform
+import resource
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_BASELINE = REPO_ROOT / "benchmarks" / "baseline.json"
+MIN_SAMPLE_SECONDS = 0.2
+SUITE_NAMES = ["discover_job_links", "parse_job_page", "extract_text_from_soup", "match_keywords",
+               "find_experience", "compute_analytics", "normalize", "end_to_end", "ats_adapters"]
+
+def peak_rss_mb():
+    """Peak resident set size of this process and its waited-for children, in MiB."""
+    rss = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+              resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    return rss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+def run_suite(name, options):
+    """Time one suite in this process; returns its result dict."""
+    # the crawl writes its state, caches and outputs to the working directory
+    workdir = tempfile.mkdtemp(prefix="crawler-bench-")
+    atexit.register(shutil.rmtree, workdir, True)
+    os.chdir(workdir)
+    sys.path.insert(0, str(REPO_ROOT))
+    from benchmarks.corpus import get_corpus
+    from benchmarks.suites import SUITES
+
+    logging.getLogger().setLevel(logging.WARNING)
+    suite = SUITES[name]()
+    suite.setup(get_corpus(options.corpus, options.sites, options.jobs_per_site), options)
+    number = 1
+    if suite.calibrate:
+        started = time.perf_counter()
+        suite.run()
+        elapsed = time.perf_counter() - started
+        number = max(1, int(MIN_SAMPLE_SECONDS / max(elapsed, 1e-9)) + 1)
+    samples = []
+    pages = 0
+    for _ in range(options.repeat or suite.repeat):
+        started = time.perf_counter()
+        pages = sum(suite.run() for _ in range(number))
+        samples.append(time.perf_counter() - started)
+    seconds = statistics.median(samples)
+    return {
+        "suite": name,
+        "pages": pages,
+        "seconds": seconds,
+        "pages_per_s": pages / seconds if seconds else 0.0,
+        "ms_per_page": seconds * 1000 / pages if pages else float("nan"),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+def spawn_suite(name, argv):
+    """Run one suite in a fresh interpreter; returns its result dict or None on failure."""
+    proc = subprocess.run([sys.executable, "-m", "benchmarks.run", "--child", name] + argv,
+                          cwd=REPO_ROOT, capture_output=True, text=True)
+    if proc.returncode != 0:
+        sys.stderr.write(f"suite {name} failed:\n{proc.stderr}\n")
+        return None
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+def compare(results, baseline, tolerance):
+    """Annotate results with the change against baseline; returns names of regressed suites."""
+    regressed = []
+    for result in results:
+        base = baseline.get("suites", {}).get(result["suite"])
+        if not base:
+            continue
+        result["ms_change"] = result["ms_per_page"] / base["ms_per_page"] - 1
+        result["rss_change"] = result["peak_rss_mb"] / base["peak_rss_mb"] - 1
+        if result["ms_change"] > tolerance or result["rss_change"] > tolerance:
+            regressed.append(result["suite"])
+    return regressed
+
+def report(results, regressed):
+    print(f"{'suite':<24}{'pages':>8}{'pages/s':>12}{'ms/page':>10}{'peak RSS MiB':>14}  vs baseline")
+    for r in results:
+        delta = ""
+        if "ms_change" in r:
+            delta = f"{r['ms_change']:+.1%} time {r['rss_change']:+.1%} rss"
+            if r["suite"] in regressed:
+                delta += " !"
+        print(f"{r['suite']:<24}{r['pages']:>8}{r['pages_per_s']:>12.1f}{r['ms_per_page']:>10.3f}"
+              f"{r['peak_rss_mb']:>14.1f}  {delta}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--suite", action="append", choices=SUITE_NAMES, help="suite to run (repeatable; default all)")
+    parser.add_argument("--corpus", help="recorded corpus directory (default: synthetic corpus)")
+    parser.add_argument("--sites", type=int, default=8, help="synthetic corpus: number of sites")
+    parser.add_argument("--jobs-per-site", type=int, default=40, help="synthetic corpus: job pages per site")
+    parser.add_argument("--repeat", type=int, help="timed samples per suite (default per suite)")
+    parser.add_argument("--latency", type=float, default=0.0, help="fixture server: mean response latency (s)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="fixture server: latency std deviation (s)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fixture server: share of 503 responses")
+    parser.add_argument("--parse-workers", type=int, default=2, help="end_to_end, ats_adapters: parser processes")
+    parser.add_argument("--polite", action="store_true",
+                        help="end_to_end, ats_adapters: keep the per-host rate limiter delays")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="write these results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="allowed slowdown / growth vs baseline")
+    parser.add_argument("--fail-on-regression", action="store_true", help="exit 1 if any suite regressed")
+    parser.add_argument("--json", type=Path, help="also write results to this file")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    options, passthrough = parser.parse_known_args()
+
+    if options.child:
+        print(json.dumps(run_suite(options.child, options)))
+        return 0
+
+    # children get the same options minus the parent-only ones
+    argv = []
+    for key in ("corpus", "sites", "jobs_per_site", "repeat", "latency", "jitter", "error_rate", "parse_workers"):
+        value = getattr(options, key)
+        if value is not None:
+            argv += [f"--{key.replace('_', '-')}", str(value)]
+    if options.polite:
+        argv.append("--polite")
+    argv += passthrough
+    results = [r for r in (spawn_suite(name, argv) for name in options.suite or SUITE_NAMES) if r]
+
+    baseline = json.loads(options.baseline.read_text()) if options.baseline.exists() else {}
+    regressed = compare(results, baseline, options.tolerance) if baseline and not options.save_baseline else []
+    report(results, regressed)
+    payload = {
+        "meta": {"python": platform.python_version(), "platform": platform.platform(),
+                 "corpus": options.corpus or f"synthetic {options.sites}x{options.jobs_per_site}",
+                 "created": time.strftime("%Y-%m-%dT%H:%M:%S")},
+        "suites": {r["suite"]: r for r in results},
+    }
+    if options.json:
+        options.json.write_text(json.dumps(payload, indent=1))
+    if options.save_baseline:
+        options.baseline.write_text(json.dumps(payload, indent=1))
+        print(f"Saved baseline to {options.baseline}")
+    elif regressed:
+        print(f"Regressed beyond {options.tolerance:.0%}: {', '.join(regressed)}")
+        if options.fail_on_regression:
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,190 @@
+"""Benchmark suites, asv style: ``setup(corpus, options)`` once, then ``run()`` is timed.
+
+``run()`` returns how many pages (or records) it processed, which the runner
+turns into pages/s and ms/page. Importing this module imports script, so the
+runner changes into a scratch directory first.
+"""
+import asyncio
+import random
+import tempfile
+from pathlib import Path
+
+import script
+from benchmarks.fixture_server import AtsFixtureServer, FixtureServer
+
+class Suite:
+    calibrate = True  # repeat run() inside one sample until it lasts long enough to time
+    repeat = 5
+
+    def setup(self, corpus, options):
+        self.landing = [(f"http://{site.name}.test{site.root}", site.pages[site.root]) for site in corpus]
+        self.jobs = [(f"http://{site.name}.test{path}", html) for site in corpus for path, html in site.job_pages()]
+
+    def run(self):
+        raise NotImplementedError
+
+class DiscoverJobLinks(Suite):
+    name = "discover_job_links"
+
+    def run(self):
+        for url, html in self.landing:
+            script.discover_job_links(url, html)
+        return len(self.landing)
+
+class ParseJobPage(Suite):
+    name = "parse_job_page"
+
+    def run(self):
+        for url, html in self.jobs:
+            script.parse_job_page(url, html)
+        return len(self.jobs)
+
+class ExtractText(Suite):
+    name = "extract_text_from_soup"
+
+    def setup(self, corpus, options):
+        super().setup(corpus, options)
+        self.docs = [script.parse_document(html) for _, html in self.jobs]
+
+    def run(self):
+        for doc in self.docs:
+            script.extract_text_from_soup(doc)
+        return len(self.docs)
+
+class _TextSuite(Suite):
+    def setup(self, corpus, options):
+        super().setup(corpus, options)
+        self.texts = [script.extract_text_from_soup(script.parse_document(html)) for _, html in self.jobs]
+
+class MatchKeywords(_TextSuite):
+    name = "match_keywords"
+
+    def run(self):
+        for text in self.texts:
+            script.match_keywords(text, script.BACKEND_TECH_STACK)
+            script.match_keywords(text, script.LANGUAGES)
+        return len(self.texts)
+
+class FindExperience(_TextSuite):
+    name = "find_experience"
+
+    def run(self):
+        for text in self.texts:
+            script.find_experience(text)
+        return len(self.texts)
+
+class ComputeAnalytics(Suite):
+    name = "compute_analytics"
+    records = 20_000
+
+    def setup(self, corpus, options):
+        super().setup(corpus, options)
+        parsed = [script.parse_job_page(url, html) for url, html in self.jobs]
+        for job, (url, _) in zip(parsed, self.jobs):
+            job["company_root"] = url.split("/jobs/")[0]
+        self.all_jobs = (parsed * (self.records // len(parsed) + 1))[:self.records]
+
+    def run(self):
+        script.compute_analytics(self.all_jobs)
+        return len(self.all_jobs)
+
+class Normalize(Suite):
+    """parse_date_text + canonical_location over a job-board mix of raw strings, caches cold each run."""
+
+    name = "normalize"
+    strings = 5_000
+    DATES = ["2024-03-05", "2024-03-05T10:00:00Z", "Posted 3 days ago", "Posted 30+ days ago", "Posted today",
+             "March 5, 2024", "5 March 2024", "05.03.2024", "03/05/2024", "Posted Dec 2023"]
+    LOCATIONS = ["Bangalore, India", "Bengaluru, Karnataka, India", "Austin, TX", "Remote - India",
+                 "London, UK; Dublin, Ireland", "Location: Gurgaon (Hybrid)", "Springfield, IL, USA", "Multiple Locations"]
+
+    def setup(self, corpus, options):
+        rng = random.Random(7)
+        # a long tail of distinct strings behind a few very common ones, as across real postings
+        self.dates = [rng.choice(self.DATES) if rng.random() < 0.8 else f"Posted {rng.randint(1, 400)} days ago"
+                      for _ in range(self.strings)]
+        self.locations = [rng.choice(self.LOCATIONS) if rng.random() < 0.8 else f"Town {rng.randint(1, 2000)}, India"
+                          for _ in range(self.strings)]
+
+    def run(self):
+        script._parse_date_text.cache_clear()
+        script._canonical_location.cache_clear()
+        for date, location in zip(self.dates, self.locations):
+            script.parse_date_text(date)
+            script.canonical_location(location)
+        return self.strings
+
+class EndToEnd(Suite):
+    """Full crawl_roots_async run against the fixture server, sinks disabled."""
+
+    name = "end_to_end"
+    calibrate = False
+    repeat = 3
+
+    def setup(self, corpus, options):
+        self.corpus = corpus
+        self.options = options
+        if not options.polite:
+            # measure the crawler, not the politeness delays
+            script.rate_limiter = script.HostRateLimiter(base_delay=0, min_delay=0, jitter=0)
+
+    async def _crawl(self, state):
+        async with FixtureServer(self.corpus, latency=self.options.latency, jitter=self.options.jitter,
+                                 error_rate=self.options.error_rate) as server:
+            await script.crawl_roots_async(server.roots, state, parse_workers=self.options.parse_workers)
+            return server.stats["pages"]
+
+    def run(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            state = script.CrawlStateStore(path=Path(tmp) / "state.sqlite", legacy_path=None)
+            try:
+                return asyncio.run(self._crawl(state))
+            finally:
+                state.close()
+
+class AtsAdapters(Suite):
+    """Every ATS adapter against the recorded API payloads, sites x jobs-per-site postings per vendor.
+
+    Also a check: each adapter must detect its board URL and return every
+    posting with the ``required`` fields filled (unless errors are injected).
+    """
+
+    name = "ats_adapters"
+    calibrate = False
+    repeat = 3
+    required = ("url", "title", "location", "posted", "raw_description_snippet")
+
+    def setup(self, corpus, options):
+        self.options = options
+        self.postings = options.sites * options.jobs_per_site
+        if not options.polite:
+            script.rate_limiter = script.HostRateLimiter(base_delay=0, min_delay=0, jitter=0)
+
+    async def _crawl_board(self, vendor, board_url, engine, parse_stage):
+        adapter = script.detect_ats(board_url)
+        if adapter is None or adapter.name != vendor:
+            raise RuntimeError(f"{board_url} not detected as {vendor}")
+        jobs = []
+        await script.crawl_ats(adapter, engine, parse_stage, jobs.append, self.postings)
+        if not self.options.error_rate:
+            complete = [job for job in jobs if all(job[k] for k in self.required)]
+            if len(complete) != self.postings:
+                raise RuntimeError(f"{vendor}: {len(complete)} of {self.postings} postings came back complete")
+        return len(jobs)
+
+    async def _crawl(self):
+        async with AtsFixtureServer(self.postings, latency=self.options.latency, jitter=self.options.jitter,
+                                    error_rate=self.options.error_rate) as server:
+            script.ATS_API_BASES.update({vendor: server.api_base for vendor in server.boards})
+            async with script.AsyncFetchEngine() as engine, \
+                    script.ParseStage(workers=self.options.parse_workers) as parse_stage:
+                counts = await asyncio.gather(*(self._crawl_board(vendor, url, engine, parse_stage)
+                                                for vendor, url in server.boards.items()))
+            return sum(counts)
+
+    def run(self):
+        return asyncio.run(self._crawl())
+
+SUITES = {cls.name: cls for cls in
+          [DiscoverJobLinks, ParseJobPage, ExtractText, MatchKeywords, FindExperience, ComputeAnalytics, Normalize,
+           EndToEnd, AtsAdapters]}
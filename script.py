@@ -2,29 +2,74 @@
 Careers crawler + analytics starter.
 
 Features:
-- Use requests+bs4 for static pages
-- Use Playwright sync for dynamic pages (fallback)
+- Use requests for static pages, aiohttp for concurrent crawling across hosts
+- Use Playwright for dynamic pages (fallback), on a pooled browser with resource blocking
 - robots.txt checking, polite rate limiting, retries
+- Single lxml parse per page shared by link discovery and field extraction
 - Keyword matching for tech stacks & languages
 - Experience bucketing via regex heuristics
-- Output JSON/CSV analytics
+- Jobs streamed to NDJSON/CSV/Parquet as they are parsed; analytics to a small JSON file
 """
 
 import time
 import json
+import csv
 import re
 import logging
 import random
+import math
+import hashlib
+import multiprocessing
+import shutil
+import socket
+import sys
+from bisect import bisect_left
+from collections import Counter, deque
+from contextlib import contextmanager
+from functools import lru_cache
+import asyncio
+import os
+import threading
+import sqlite3
+import zlib
+from email.utils import parsedate_to_datetime
+from html import unescape
+from datetime import datetime, timezone
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from urllib.parse import urljoin, urlparse
+from urllib.parse import urljoin, urlparse, urlunparse, parse_qsl, urlencode
+from urllib.robotparser import RobotFileParser
 import tldextract
 import requests
-from bs4 import BeautifulSoup
+import aiohttp
+import aiohttp.web
+import lxml.html
+from lxml import etree
 from dateutil import parser as dateparser
 from requests.adapters import HTTPAdapter, Retry
 
-# Playwright (sync) for dynamic pages
+try:
+    # optional: only needed for Parquet output
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+try:
+    # optional: vectorized SimHash bit counts (pure Python otherwise)
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    # optional: zstd page archive segments (zlib otherwise)
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Playwright for dynamic pages (sync for one-off renders, async for the crawl pool)
 from playwright.sync_api import sync_playwright
+from playwright.async_api import async_playwright
 
 # -----------------------------
 # Configuration (customize)
@@ -141,10 +186,76 @@ LANGUAGES = ["java", "python", "c++", "c#", "javascript", "typescript", "rust",
 EXPERIENCE_BUCKETS = ["0", "1-2", "2-4", "4-8", ">8"]
 
 USER_AGENT = "Mozilla/5.0 (compatible; CareerCrawler/1.0; +https://example.com/bot)"
+ROBOTS_USER_AGENT = "CareerCrawler"  # product token matched against robots.txt User-agent lines
 RATE_LIMIT_SECONDS = 1.0  # base delay between requests (add jitter)
 REQUEST_TIMEOUT = 15  # seconds
-STATE_FILE = Path("crawler_state.json")
-OUTPUT_FILE = Path("career_analytics.json")
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+GLOBAL_CONNECTION_LIMIT = 64  # open connections across all hosts
+HOST_CONCURRENCY = 2  # in-flight requests per host
+ROOT_CONCURRENCY = 16  # careers roots crawled at the same time
+MIN_HOST_DELAY = 0.25  # fastest spacing the adaptive limiter will reach for a healthy host
+MAX_HOST_DELAY = 60.0  # slowest spacing after repeated errors / Retry-After
+MAX_RETRY_AFTER = 300.0  # a host asking for a longer wait is left for the next run
+FAST_RESPONSE_SECONDS = 0.5  # responses quicker than this let the limiter speed up
+RENDER_CONCURRENCY = 4  # Playwright pages rendered at the same time
+STATIC_MIN_BYTES = 500  # smaller static bodies are treated as JS shells
+ROUTER_PROBE_EVERY = 20  # re-try static on a render-routed host every N requests
+PARSE_WORKERS = os.cpu_count() or 1  # parser processes; 0 parses inline on the event loop
+PARSE_QUEUE_SIZE = 4 * PARSE_WORKERS  # fetched pages waiting for a parser before fetchers block
+BLOCKED_RESOURCE_TYPES = {"image", "font", "media"}
+TRACKER_HOSTS = [
+    "google-analytics.com", "googletagmanager.com", "doubleclick.net", "facebook.net",
+    "hotjar.com", "segment.io", "segment.com", "optimizely.com", "newrelic.com", "nr-data.net",
+    "bat.bing.com", "px.ads.linkedin.com", "adsrvr.org", "demdex.net", "omtrdc.net", "onetrust.com",
+]
+# host -> CSS selector that marks a rendered listing; hosts not listed wait for networkidle
+RENDER_WAIT_SELECTORS = {
+    # "careers.example.com": "ul.job-results li",
+}
+STATE_FILE = Path("crawler_state.json")  # legacy JSON state, imported into STATE_DB_FILE once
+STATE_DB_FILE = Path("crawler_state.sqlite")
+STATE_BATCH_SIZE = 200  # state changes per SQLite transaction
+STATE_COMMIT_SECONDS = 5.0  # ...or commit at least this often
+OUTPUT_FILE = Path("career_analytics.json")  # analytics only; jobs stream to JOBS_OUTPUT_STEM.*
+JOBS_OUTPUT_STEM = Path("career_jobs")
+OUTPUT_FORMATS = ["ndjson", "csv"]  # add "parquet" when pyarrow is installed
+LOCATION_SKETCH_SIZE = 200  # counters kept by the top-locations heavy-hitters sketch
+SIMHASH_MAX_DISTANCE = 3  # differing bits under which same-title descriptions are one job
+FRONTIER_CAPACITY = 5_000_000  # URLs the in-memory visited set is sized for (store-less crawls)
+ROOT_FETCH_WORKERS = 4  # pages of one root in flight at once (per-host limits still apply)
+ROBOTS_CACHE_FILE = Path("robots_cache.sqlite")
+ROBOTS_TTL_SECONDS = 24 * 3600  # refetch robots.txt once a day
+ROBOTS_RETRY_SECONDS = 15 * 60  # retry a robots.txt that failed with 429/5xx or could not be fetched
+HTTP_CACHE_FILE = Path("http_cache.sqlite")
+HTTP_CACHE_MAX_BYTES = 2 * 1024 ** 3  # compressed bodies kept before LRU eviction
+HTTP_CACHE_TIMEOUT = 30  # seconds to wait for another process's write lock on the cache
+# ATS API hosts; Workday and Eightfold default to the careers host itself. Point
+# an entry at a local stub server to replay recorded API responses.
+ATS_API_BASES = {
+    "greenhouse": "https://boards-api.greenhouse.io",
+    "lever": "https://api.lever.co",
+    "smartrecruiters": "https://api.smartrecruiters.com",
+}
+ATS_PAGE_SIZE = 100  # postings per API request where the ATS lets us choose
+SITEMAP_DISCOVERY = True  # find job URLs via sitemaps before falling back to link discovery
+SITEMAP_MAX_FILES = 50  # sitemap / sitemap-index documents read per root
+SITEMAP_MAX_URLS = 50_000  # matching job URLs collected per root
+METRICS_FILE = Path("crawler_metrics.prom")  # Prometheus text snapshot, rewritten after every root
+METRICS_PORT = None  # serve http://127.0.0.1:PORT/metrics while crawling when set
+STAGE_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)  # seconds
+WORK_QUEUE_FILE = Path("crawl_queue.sqlite")  # shared shard queue for distributed crawls
+WORKER_STATE_DIR = Path("crawl_workers")  # one state store per worker, merged by the coordinator
+LEASE_SECONDS = 300  # a shard not renewed for this long goes back to the queue
+LEASE_BATCH = 4  # shards (registered domains) a worker leases at a time
+MAX_LEASE_ATTEMPTS = 3  # leases per shard before it is given up as failing
+QUEUE_POLL_SECONDS = 5.0  # idle workers / the coordinator check the queue this often
+ARCHIVE_PAGES = False  # keep every fetched page in ARCHIVE_DIR so reextract() can re-parse without crawling
+ARCHIVE_DIR = Path("page_archive")
+ARCHIVE_SEGMENT_BYTES = 256 * 1024 ** 2  # compressed bytes per archive segment file
+REEXTRACT_CHUNK = 256  # archived pages per re-extraction task
+NORMALIZE_CACHE_SIZE = 65_536  # distinct date / location strings memoized per process
+DATE_TEXT_MAX = 100  # longer posted-date text is cut before parsing
+LOCATION_TEXT_MAX = 200
 
 # -----------------------------
 # Logging setup
@@ -160,41 +271,715 @@ logger = logging.getLogger("career-crawler")
 # -----------------------------
 session = requests.Session()
 session.verify = False
-retries = Retry(total=3, backoff_factor=0.6, status_forcelist=(429, 500, 502, 503, 504))
+retries = Retry(total=3, backoff_factor=0.6, status_forcelist=RETRY_STATUSES)
 session.mount("https://", HTTPAdapter(max_retries=retries))
 session.headers.update({"User-Agent": USER_AGENT})
 
+# -----------------------------
+# Adaptive per-host rate limiting
+# -----------------------------
+def parse_retry_after(value):
+    """Return seconds to wait from a Retry-After header (delta-seconds or HTTP-date)."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except Exception:
+        return None
+
+class HostRateLimiter:
+    """AIMD request spacing per host.
+
+    Every host starts at ``base_delay`` seconds between requests. Quick, successful
+    responses shave the delay additively down to the host floor (``MIN_HOST_DELAY``
+    or the robots.txt Crawl-delay); errors and throttling responses multiply it.
+    ``Retry-After`` pushes the next slot out by at least that long; a host held off
+    for more than ``max_wait`` seconds gets no slot at all. Callers ``reserve()`` a
+    slot, sleep for the returned time, then ``record()`` the outcome.
+    Thread-safe so the sync and async fetch paths can share one instance.
+    """
+
+    def __init__(self, base_delay=RATE_LIMIT_SECONDS, min_delay=MIN_HOST_DELAY, max_delay=MAX_HOST_DELAY,
+                 step=0.1, backoff=2.0, jitter=0.5, max_wait=MAX_RETRY_AFTER):
+        self.base_delay = base_delay
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.step = step
+        self.backoff = backoff
+        self.jitter = jitter
+        self.max_wait = max_wait
+        self._hosts = {}
+        self._lock = threading.Lock()
+
+    def _host(self, host):
+        h = self._hosts.get(host)
+        if h is None:
+            h = self._hosts[host] = {"delay": self.base_delay, "floor": self.min_delay, "next_at": 0.0}
+        return h
+
+    def delay(self, host):
+        with self._lock:
+            return self._host(host)["delay"]
+
+    def set_crawl_delay(self, host, seconds):
+        """Apply a robots.txt Crawl-delay as the lower bound for this host."""
+        with self._lock:
+            h = self._host(host)
+            h["floor"] = min(max(self.min_delay, float(seconds)), self.max_delay)
+            h["delay"] = max(h["delay"], h["floor"])
+
+    def held_off(self, host):
+        """True if host's Retry-After keeps it closed for longer than ``max_wait``."""
+        with self._lock:
+            return self._host(host)["next_at"] - time.monotonic() > self.max_wait
+
+    def reserve(self, host):
+        """Claim the next request slot for host; returns seconds to sleep before sending, or None if held off."""
+        with self._lock:
+            h = self._host(host)
+            now = time.monotonic()
+            if h["next_at"] - now > self.max_wait:
+                return None
+            start = max(now, h["next_at"])
+            h["next_at"] = start + h["delay"] + random.random() * self.jitter * h["delay"]
+            return start - now
+
+    def record(self, host, status=None, latency=None, retry_after=None, error=False):
+        """Feed back the outcome of a request to adapt the host's spacing."""
+        with self._lock:
+            h = self._host(host)
+            if retry_after is not None:
+                h["next_at"] = max(h["next_at"], time.monotonic() + retry_after)
+            if error or status in RETRY_STATUSES or retry_after is not None:
+                h["delay"] = min(self.max_delay, max(h["delay"], self.base_delay) * self.backoff)
+            elif status is not None and status < 400 and latency is not None and latency < FAST_RESPONSE_SECONDS:
+                h["delay"] = max(h["floor"], h["delay"] - self.step)
+
+rate_limiter = HostRateLimiter()
+
+# -----------------------------
+# Metrics (stage timings, per-host counters, queue depths)
+# -----------------------------
+METRIC_HELP = {
+    "crawler_stage_seconds": "Time spent per crawl stage.",
+    "crawler_host_requests_total": "HTTP requests sent, per host.",
+    "crawler_host_responses_total": "HTTP responses received, per host and status code.",
+    "crawler_host_bytes_total": "Response body characters received, per host.",
+    "crawler_host_retries_total": "Requests retried after a throttling or server error, per host.",
+    "crawler_host_errors_total": "Requests that failed without a response, per host.",
+    "crawler_host_renders_total": "Pages rendered with Playwright, per host.",
+    "crawler_host_render_fallbacks_total": "Static fetches that were not usable and fell back to rendering, per host.",
+    "crawler_host_parse_failures_total": "Fetched job pages that yielded no job record, per host.",
+    "crawler_jobs_total": "Job records stored.",
+    "crawler_duplicate_jobs_total": "Near-duplicate job records folded into an existing job.",
+    "crawler_crawl_queue_depth": "Pages queued for fetching across all roots.",
+    "crawler_parse_queue_depth": "Fetched pages waiting for a parser process.",
+    "crawler_roots_in_progress": "Careers roots being crawled.",
+    "crawler_http_cache_events": "HTTP cache hits, revalidations, misses, stores and evictions this run.",
+    "crawler_archive_bytes_total": "Compressed bytes appended to the page archive.",
+}
+
+def _escape_label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _label_str(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape_label(v)}"' for k, v in labels) + "}"
+
+class Metrics:
+    """In-process metrics registry, cheap enough to leave on for every run.
+
+    ``observe()`` / ``timer()`` feed fixed-bucket histograms per stage,
+    ``inc()`` bumps labelled counters and ``set_gauge()`` / ``add_gauge()``
+    track queue depths. Each update is a dict operation under one lock, so
+    the sync (thread) and async paths can share the instance. Export with
+    ``to_prometheus()`` (text exposition format) or ``summary()``.
+    Collectors added with ``add_collector`` run before each export to
+    refresh values kept elsewhere (e.g. HTTP cache stats).
+    """
+
+    def __init__(self, buckets=STAGE_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._hist = {}  # stage -> [bucket counts (last is +Inf), sum]
+        self._counters = {}  # (name, labels) -> value
+        self._gauges = {}
+        self._collectors = []
+
+    def observe(self, stage, seconds):
+        i = bisect_left(self.buckets, seconds)
+        with self._lock:
+            h = self._hist.get(stage)
+            if h is None:
+                h = self._hist[stage] = [[0] * (len(self.buckets) + 1), 0.0]
+            h[0][i] += 1
+            h[1] += seconds
+
+    @contextmanager
+    def timer(self, stage):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - started)
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def set_gauge(self, name, value, **labels):
+        with self._lock:
+            self._gauges[(name, tuple(sorted(labels.items())))] = value
+
+    def add_gauge(self, name, delta, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._gauges[key] = self._gauges.get(key, 0) + delta
+
+    def add_collector(self, fn):
+        self._collectors.append(fn)
+
+    def _snapshot(self):
+        for fn in self._collectors:
+            fn(self)
+        with self._lock:
+            hist = {stage: (list(h[0]), h[1]) for stage, h in self._hist.items()}
+            return hist, dict(self._counters), dict(self._gauges)
+
+    def to_prometheus(self):
+        """All metrics in the Prometheus text exposition format."""
+        hist, counters, gauges = self._snapshot()
+        lines = []
+        if hist:
+            lines += [f"# HELP crawler_stage_seconds {METRIC_HELP['crawler_stage_seconds']}",
+                      "# TYPE crawler_stage_seconds histogram"]
+            for stage, (counts, total) in sorted(hist.items()):
+                cumulative = 0
+                for le, n in zip([*map(str, self.buckets), "+Inf"], counts):
+                    cumulative += n
+                    lines.append(f"crawler_stage_seconds_bucket{_label_str([('stage', stage), ('le', le)])} {cumulative}")
+                lines.append(f"crawler_stage_seconds_sum{_label_str([('stage', stage)])} {total:.6f}")
+                lines.append(f"crawler_stage_seconds_count{_label_str([('stage', stage)])} {cumulative}")
+        for kind, values in (("counter", counters), ("gauge", gauges)):
+            for name in sorted({n for n, _ in values}):
+                if name in METRIC_HELP:
+                    lines.append(f"# HELP {name} {METRIC_HELP[name]}")
+                lines.append(f"# TYPE {name} {kind}")
+                for (n, labels), value in sorted(values.items()):
+                    if n == name:
+                        lines.append(f"{name}{_label_str(labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+    def _quantile(self, counts, q):
+        # upper bound of the bucket holding the q-th observation
+        target = q * sum(counts)
+        seen = 0
+        for le, n in zip(self.buckets + (float("inf"),), counts):
+            seen += n
+            if seen >= target:
+                return le
+        return float("inf")
+
+    def summary(self, top_hosts=10):
+        """Run summary: per-stage count / total / mean / p50 / p95, totals per counter and the busiest hosts."""
+        hist, counters, _ = self._snapshot()
+        stages = {}
+        for stage, (counts, total) in hist.items():
+            n = sum(counts)
+            stages[stage] = {"count": n, "total_s": round(total, 3), "mean_ms": round(total * 1000 / n, 2) if n else 0.0,
+                             "p50_le_s": self._quantile(counts, 0.5), "p95_le_s": self._quantile(counts, 0.95)}
+        totals = Counter()
+        hosts = {}
+        for (name, labels), value in counters.items():
+            totals[name] += value
+            host = dict(labels).get("host")
+            if host:
+                per_host = hosts.setdefault(host, Counter())
+                code = dict(labels).get("code")
+                per_host[f"{name}:{code}" if code else name] += value
+        busiest = sorted(hosts.items(), key=lambda kv: -kv[1]["crawler_host_requests_total"])[:top_hosts]
+        return {"stages": stages, "totals": dict(totals), "hosts": {h: dict(c) for h, c in busiest}}
+
+    def write(self, path=METRICS_FILE):
+        """Write the Prometheus text snapshot to path (atomically, for node_exporter's textfile collector)."""
+        tmp = Path(f"{path}.tmp")
+        tmp.write_text(self.to_prometheus())
+        os.replace(tmp, path)
+
+    async def serve(self, port, host="127.0.0.1"):
+        """Serve /metrics on host:port; returns the aiohttp runner to ``cleanup()`` when done."""
+        async def handle(_request):
+            return aiohttp.web.Response(text=self.to_prometheus(), content_type="text/plain")
+
+        app = aiohttp.web.Application()
+        app.router.add_get("/metrics", handle)
+        runner = aiohttp.web.AppRunner(app, access_log=None)
+        await runner.setup()
+        await aiohttp.web.TCPSite(runner, host, port).start()
+        logger.info(f"Serving metrics on http://{host}:{port}/metrics")
+        return runner
+
+metrics = Metrics()
+
 # -----------------------------
 # Utilities
 # -----------------------------
-def polite_sleep():
-    time.sleep(RATE_LIMIT_SECONDS + random.random() * 0.5)
+def polite_sleep(url=None):
+    """Block until the rate limiter grants the next slot for url's host; False if the host is held off."""
+    if url is None:
+        wait = RATE_LIMIT_SECONDS + random.random() * 0.5
+    else:
+        wait = rate_limiter.reserve(urlparse(url).netloc)
+        if wait is None:
+            return False
+    metrics.observe("polite_sleep", wait)
+    time.sleep(wait)
+    return True
 
-def is_allowed_by_robots(url):
-    # Simple robots check - uses /robots.txt
-    parsed = urlparse(url)
-    robots_url = f"{parsed.scheme}://{parsed.netloc}/robots.txt"
-    try:
-        r = session.get(robots_url, timeout=REQUEST_TIMEOUT)
-        robots_text = r.text.lower()
-        # VERY simple: if "disallow: /" present for all user-agents, block; for more advanced, use urllib.robotparser
-        if "disallow: /" in robots_text:
-            logger.warning(f"robots.txt disallows crawling {parsed.netloc}")
+# -----------------------------
+# robots.txt (parsed per user-agent, cached per netloc)
+# -----------------------------
+class RobotsCache:
+    """Parsed robots.txt rules per netloc, kept in memory and in a SQLite file (shared by workers) with a TTL.
+
+    ``ensure()`` fetches a host's robots.txt at most once per TTL; ``allowed()``
+    only consults the cache, so every discovered URL can be checked without a
+    network round trip. 401/403 on robots.txt disallows the site and other 4xx
+    allow it. A 429, a 5xx or an unreachable robots.txt is a temporary failure
+    (RFC 9309): the last good rules stay in force, or the whole site is
+    disallowed if there are none, and the file is retried after ``retry_ttl``
+    instead of the full TTL.
+    """
+
+    def __init__(self, path=ROBOTS_CACHE_FILE, ttl=ROBOTS_TTL_SECONDS, user_agent=ROBOTS_USER_AGENT,
+                 retry_ttl=ROBOTS_RETRY_SECONDS):
+        self.path = path
+        self.ttl = ttl
+        self.retry_ttl = retry_ttl
+        self.user_agent = user_agent
+        self._entries = {}  # netloc -> {"fetched": ts, "status": int, "text": str, "failed": bool}
+        self._parsers = {}
+        self._lock = threading.Lock()
+        self._host_locks = {}
+        self._db = None  # opened on first use
+        self._db_lock = threading.Lock()  # disk access stays outside _lock, which allowed() takes on the event loop
+
+    def _store(self):
+        if self._db is None:
+            self._db = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("CREATE TABLE IF NOT EXISTS robots (netloc TEXT PRIMARY KEY, fetched REAL, entry TEXT)")
+        return self._db
+
+    def _load(self, netloc):
+        """Adopt netloc's entry from disk if another run or worker fetched it more recently."""
+        if not self.path:
+            return
+        try:
+            with self._db_lock:
+                row = self._store().execute("SELECT fetched, entry FROM robots WHERE netloc = ?", (netloc,)).fetchone()
+        except sqlite3.Error as e:
+            logger.debug(f"robots cache read failed for {netloc}: {e}")
+            return
+        with self._lock:
+            mine = self._entries.get(netloc)
+            if row and (mine is None or mine["fetched"] < row[0]):
+                self._entries[netloc] = json.loads(row[1])
+                self._parsers.pop(netloc, None)
+
+    @staticmethod
+    def _temporary_failure(status):
+        return status == 429 or status >= 500
+
+    def _fresh(self, netloc):
+        entry = self._entries.get(netloc)
+        if entry is None:
             return False
-        return True
-    except Exception:
-        # if robots unobtainable, be conservative but allow
-        return True
+        ttl = self.retry_ttl if entry.get("failed") else self.ttl
+        return time.time() - entry["fetched"] < ttl
+
+    def _parser(self, netloc):
+        rp = self._parsers.get(netloc)
+        if rp is None:
+            entry = self._entries[netloc]
+            rp = RobotFileParser()
+            if entry["status"] in (401, 403) or self._temporary_failure(entry["status"]):
+                rp.disallow_all = True
+            elif entry["status"] >= 400:
+                rp.allow_all = True
+            else:
+                rp.parse(entry["text"].splitlines())
+            self._parsers[netloc] = rp
+            delay = rp.crawl_delay(self.user_agent)
+            if delay:
+                rate_limiter.set_crawl_delay(netloc, delay)
+        return rp
+
+    def ensure(self, url):
+        """Make sure rules for url's netloc are cached, fetching robots.txt if stale."""
+        parsed = urlparse(url)
+        netloc = parsed.netloc
+        with self._lock:
+            host_lock = self._host_locks.setdefault(netloc, threading.Lock())
+        with host_lock:
+            if not self._fresh(netloc):
+                self._load(netloc)
+            # offline replay never fetches; stale or missing rules are used as-is
+            if not self._fresh(netloc) and not get_http_cache().offline:
+                robots_url = f"{parsed.scheme}://{netloc}/robots.txt"
+                try:
+                    if not polite_sleep(robots_url):
+                        raise RuntimeError("host asked us to wait longer than MAX_RETRY_AFTER")
+                    with metrics.timer("robots"):
+                        r = session.get(robots_url, timeout=REQUEST_TIMEOUT)
+                    metrics.inc("crawler_host_requests_total", host=netloc)
+                    metrics.inc("crawler_host_responses_total", host=netloc, code=r.status_code)
+                    entry = {"fetched": time.time(), "status": r.status_code, "text": r.text}
+                except Exception as e:
+                    logger.debug(f"robots.txt fetch failed {robots_url}: {e}")
+                    entry = {"fetched": time.time(), "status": 599, "text": ""}
+                if self._temporary_failure(entry["status"]):
+                    logger.info(f"robots.txt for {netloc} unavailable (HTTP {entry['status']}); retrying later")
+                    previous = self._entries.get(netloc)
+                    if previous is not None and not self._temporary_failure(previous["status"]):
+                        # keep obeying the last rules we could read
+                        entry = dict(previous, fetched=entry["fetched"])
+                    entry["failed"] = True
+                with self._lock:
+                    self._entries[netloc] = entry
+                    self._parsers.pop(netloc, None)
+                self.save(netloc, entry)
+            with self._lock:
+                if netloc in self._entries:
+                    self._parser(netloc)
+
+    def allowed(self, url):
+        """Check url against cached rules; hosts not cached yet are allowed (no fetch here)."""
+        netloc = urlparse(url).netloc
+        with self._lock:
+            if netloc not in self._entries:
+                return True
+            return self._parser(netloc).can_fetch(self.user_agent, url)
+
+    def sitemaps(self, url):
+        """Sitemap URLs declared in the cached robots.txt of url's host (call ensure first)."""
+        netloc = urlparse(url).netloc
+        with self._lock:
+            if netloc not in self._entries:
+                return []
+            return list(self._parser(netloc).site_maps() or [])
+
+    def save(self, netloc, entry):
+        """Write netloc's entry to disk unless another worker has saved a newer one."""
+        if not self.path:
+            return
+        try:
+            with self._db_lock, self._store() as db:
+                db.execute(
+                    "INSERT INTO robots VALUES (?, ?, ?) ON CONFLICT(netloc) DO UPDATE SET"
+                    " fetched = excluded.fetched, entry = excluded.entry WHERE excluded.fetched > robots.fetched",
+                    (netloc, entry["fetched"], json.dumps(entry)),
+                )
+        except sqlite3.Error as e:
+            logger.warning(f"robots cache write failed for {netloc}: {e}")
+
+robots = RobotsCache()
+
+def is_allowed_by_robots(url):
+    """Robots check for url, fetching the host's robots.txt only if not cached."""
+    robots.ensure(url)
+    if not robots.allowed(url):
+        logger.warning(f"robots.txt disallows crawling {url}")
+        return False
+    return True
+
+async def filter_allowed_by_robots(urls):
+    """Drop urls disallowed by robots.txt; unseen hosts are fetched once off the event loop."""
+    unseen = {f"{urlparse(u).scheme}://{urlparse(u).netloc}/" for u in urls}
+    await asyncio.gather(*(asyncio.to_thread(robots.ensure, u) for u in unseen))
+    return [u for u in urls if robots.allowed(u)]
+
+# -----------------------------
+# URL canonicalization + crawl frontier
+# -----------------------------
+TRACKING_PARAMS = {"gclid", "fbclid", "msclkid", "mc_cid", "mc_eid", "_ga", "src", "source", "ref", "referrer"}
+DEFAULT_PORTS = {"http": "80", "https": "443"}
+JOB_DETAIL_RE = re.compile(
+    r"/(job|position|opening|vacanc(y|ie)|requisition|req|posting)s?[-_/][^?#]*\d{3,}"
+    r"|[?&](job_?id|req_?id|gh_jid|jid|posting_?id)=",
+    re.I,
+)
+
+def canonicalize_url(url):
+    """Normalize a URL for use as a cache / dedup key.
+
+    Lowercases scheme and host, drops default ports, fragments, tracking
+    parameters (utm_*, gclid, ...) and trailing slashes, and sorts the query.
+    """
+    parsed = urlparse(url.strip())
+    scheme = parsed.scheme.lower()
+    netloc = parsed.netloc.lower()
+    host, _, port = netloc.partition(":")
+    if port and DEFAULT_PORTS.get(scheme) == port:
+        netloc = host
+    path = parsed.path or "/"
+    if len(path) > 1:
+        path = path.rstrip("/") or "/"
+    query = sorted(
+        (k, v) for k, v in parse_qsl(parsed.query, keep_blank_values=True)
+        if not k.lower().startswith("utm_") and k.lower() not in TRACKING_PARAMS
+    )
+    return urlunparse((scheme, netloc, path, parsed.params, urlencode(query), ""))
+
+def url_priority(url):
+    """Lower runs first: likely job-detail pages before listing / navigation pages."""
+    return 0 if JOB_DETAIL_RE.search(url) else 1
+
+class BloomFilter:
+    """Fixed-size bit array membership test; ~1.8 bytes per URL at a 0.1% false-positive rate."""
+
+    def __init__(self, capacity, error_rate=0.001):
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def __contains__(self, item):
+        return all(self.bits[p >> 3] & (1 << (p & 7)) for p in self._positions(item))
+
+    def add(self, item):
+        """Add item; returns False if it was (probably) present already."""
+        new = False
+        for p in self._positions(item):
+            mask = 1 << (p & 7)
+            if not self.bits[p >> 3] & mask:
+                self.bits[p >> 3] |= mask
+                new = True
+        self.count += new
+        return new
+
+class UrlFrontier:
+    """Canonical-URL dedup shared by every root.
+
+    ``add()`` returns the canonical URL the first time it is seen and None after,
+    so a listing reached from two roots is fetched once. With a CrawlStateStore
+    the visited set lives in its ``urls`` table, so URLs seen in earlier runs are
+    skipped too and unfinished ones can be resumed per root; without a store an
+    in-memory Bloom filter is used.
+    """
+
+    def __init__(self, store=None, capacity=FRONTIER_CAPACITY):
+        self.store = store
+        self.seen = None if store else BloomFilter(capacity)
+
+    def add(self, url, root=None, depth=1):
+        canonical = canonicalize_url(url)
+        if self.store is not None:
+            new = self.store.add_url(canonical, root, depth, url_priority(canonical))
+        else:
+            new = self.seen.add(canonical)
+        return canonical if new else None
+
+    def done(self, url):
+        if self.store is not None:
+            self.store.mark_url_done(canonicalize_url(url))
+
+    def pending(self, root):
+        return self.store.pending_urls(root) if self.store is not None else []
+
+# -----------------------------
+# Persistent conditional-GET HTTP cache
+# -----------------------------
+class HttpCache:
+    """On-disk page cache keyed by canonical URL: compressed bodies and validators in SQLite, LRU-capped.
+
+    ``offline=True`` replays from the cache without touching the network. Cache failures only log.
+    """
+
+    def __init__(self, path=HTTP_CACHE_FILE, max_bytes=HTTP_CACHE_MAX_BYTES, offline=False,
+                 timeout=HTTP_CACHE_TIMEOUT):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.offline = offline
+        self.stats = {"hits": 0, "revalidated": 0, "misses": 0, "stores": 0, "evictions": 0}
+        self._lock = threading.Lock()
+        self._accessed = {}  # key -> last read, not yet saved
+        self._db = sqlite3.connect(str(path), timeout=timeout, check_same_thread=False)
+        self._db.execute(f"PRAGMA busy_timeout = {int(timeout * 1000)}")
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS pages ("
+            " key TEXT PRIMARY KEY, final_url TEXT, etag TEXT, last_modified TEXT,"
+            " body BLOB, size INTEGER, stored REAL, accessed REAL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS pages_accessed ON pages(accessed)")
+        self._db.commit()
+        self._total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0]
+
+    @staticmethod
+    def _key(url, kind):
+        return f"{kind}:{canonicalize_url(url)}"
+
+    def get(self, url, kind="static"):
+        """Return cached entry dict (text, final_url, etag, last_modified) or None."""
+        key = self._key(url, kind)
+        try:
+            with self._lock:
+                row = self._db.execute(
+                    "SELECT final_url, etag, last_modified, body FROM pages WHERE key = ?", (key,)
+                ).fetchone()
+                if row is None:
+                    return None
+                self._accessed[key] = time.time()
+        except sqlite3.Error as e:
+            logger.warning(f"HTTP cache read failed for {url}: {e}")
+            return None
+        final_url, etag, last_modified, body = row
+        return {"text": zlib.decompress(body).decode("utf-8"), "final_url": final_url,
+                "etag": etag, "last_modified": last_modified}
+
+    @staticmethod
+    def conditional_headers(entry):
+        headers = {}
+        if entry:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def put(self, url, text, final_url, headers=None, kind="static"):
+        headers = headers or {}
+        body = zlib.compress(text.encode("utf-8"), 6)
+        key = self._key(url, kind)
+        now = time.time()
+        try:
+            with self._lock:
+                self._accessed.pop(key, None)
+                self._save_accessed()
+                old = self._db.execute("SELECT size FROM pages WHERE key = ?", (key,)).fetchone()
+                self._db.execute(
+                    "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (key, str(final_url), headers.get("ETag"), headers.get("Last-Modified"), body, len(body), now, now),
+                )
+                self._total += len(body) - (old[0] if old else 0)
+                self.stats["stores"] += 1
+                self._evict()
+                self._db.commit()
+        except sqlite3.Error as e:
+            self._db.rollback()
+            logger.warning(f"HTTP cache write failed for {url}: {e}")
+
+    def _save_accessed(self):
+        if self._accessed:
+            self._db.executemany("UPDATE pages SET accessed = ? WHERE key = ?",
+                                 [(ts, key) for key, ts in self._accessed.items()])
+            self._accessed.clear()
+
+    def _evict(self):
+        # drop least recently used bodies until 90% of the cap, leaving headroom
+        if self._total <= self.max_bytes:
+            return
+        target = self.max_bytes * 0.9
+        for key, size in self._db.execute("SELECT key, size FROM pages ORDER BY accessed").fetchall():
+            if self._total <= target:
+                break
+            self._db.execute("DELETE FROM pages WHERE key = ?", (key,))
+            self._total -= size
+            self.stats["evictions"] += 1
+
+    def close(self):
+        with self._lock:
+            try:
+                self._save_accessed()
+                self._db.commit()
+            except sqlite3.Error as e:
+                logger.warning(f"HTTP cache access times not saved: {e}")
+            self._db.close()
+
+_http_cache = None
+
+def get_http_cache():
+    """The process's HttpCache, opened at HTTP_CACHE_FILE on first use unless open_http_cache() ran."""
+    if _http_cache is None:
+        open_http_cache()
+    return _http_cache
+
+def open_http_cache(path=HTTP_CACHE_FILE, offline=False):
+    """(Re)open the process's HttpCache at path; main and each worker call this before crawling."""
+    global _http_cache
+    close_http_cache()
+    _http_cache = HttpCache(path, offline=offline)
+    return _http_cache
+
+def close_http_cache():
+    global _http_cache
+    if _http_cache is not None:
+        _http_cache.close()
+        _http_cache = None
+
+def _collect_cache_stats(registry):
+    if _http_cache is not None:
+        for event, count in _http_cache.stats.items():
+            registry.set_gauge("crawler_http_cache_events", count, event=event)
+
+metrics.add_collector(_collect_cache_stats)
 
 def fetch_static(url):
-    """Fetch page with requests + bs4. Returns (text, final_url)."""
+    """Fetch page with requests. Returns (text, final_url).
+
+    Goes through the HTTP cache: a conditional GET is sent when the page is
+    cached, a 304 is served from disk, and offline mode never hits the network.
+    """
+    cache = get_http_cache()
+    cached = cache.get(url)
+    if cache.offline:
+        cache.stats["hits" if cached else "misses"] += 1
+        return (cached["text"], cached["final_url"]) if cached else (None, url)
+    host = urlparse(url).netloc
+    if not polite_sleep(url):
+        logger.debug(f"{host} asked us to wait too long; leaving {url} for the next run")
+        return None, url
+    r = None
     try:
-        r = session.get(url, timeout=REQUEST_TIMEOUT)
+        metrics.inc("crawler_host_requests_total", host=host)
+        with metrics.timer("fetch"):
+            r = session.get(url, timeout=REQUEST_TIMEOUT, headers=cache.conditional_headers(cached))
+        metrics.inc("crawler_host_responses_total", host=host, code=r.status_code)
+        metrics.inc("crawler_host_bytes_total", len(r.text), host=host)
+        rate_limiter.record(host, status=r.status_code, latency=r.elapsed.total_seconds(),
+                            retry_after=parse_retry_after(r.headers.get("Retry-After")))
+        if r.status_code == 304 and cached:
+            cache.stats["revalidated"] += 1
+            return cached["text"], cached["final_url"]
         r.raise_for_status()
-        return r.text, r.url
     except Exception as e:
+        if r is None:
+            rate_limiter.record(host, error=True)
+            metrics.inc("crawler_host_errors_total", host=host)
         logger.debug(f"Static fetch failed {url}: {e}")
         return None, url
+    cache.stats["misses"] += 1
+    cache.put(url, r.text, r.url, r.headers)
+    return r.text, r.url
+
+def _route_sync(route):
+    if should_block_request(route.request.resource_type, route.request.url):
+        route.abort()
+    else:
+        route.continue_()
 
 def fetch_dynamic(url, playwright_browser=None):
     """Render page with Playwright (sync). Returns (text, final_url)."""
@@ -203,6 +988,7 @@ def fetch_dynamic(url, playwright_browser=None):
             with sync_playwright() as p:
                 browser = p.chromium.launch(headless=True)
                 context = browser.new_context(user_agent=USER_AGENT)
+                context.route("**/*", _route_sync)
                 page = context.new_page()
                 page.goto(url, timeout=REQUEST_TIMEOUT * 1000)
                 page.wait_for_load_state("networkidle", timeout=REQUEST_TIMEOUT * 1000)
@@ -213,6 +999,7 @@ def fetch_dynamic(url, playwright_browser=None):
         else:
             # if passed an open browser, use it (minor optimization)
             context = playwright_browser.new_context(user_agent=USER_AGENT)
+            context.route("**/*", _route_sync)
             page = context.new_page()
             page.goto(url, timeout=REQUEST_TIMEOUT * 1000)
             page.wait_for_load_state("networkidle", timeout=REQUEST_TIMEOUT * 1000)
@@ -224,6 +1011,313 @@ def fetch_dynamic(url, playwright_browser=None):
         logger.debug(f"Dynamic fetch failed: {e}")
         return None, url
 
+# -----------------------------
+# Playwright browser pool (async, shared per run)
+# -----------------------------
+def should_block_request(resource_type, url):
+    """True for sub-resources a text scrape never needs (media, fonts, trackers)."""
+    if resource_type in BLOCKED_RESOURCE_TYPES:
+        return True
+    host = urlparse(url).netloc.lower()
+    return any(host == t or host.endswith("." + t) for t in TRACKER_HOSTS)
+
+def wait_selector_for(url):
+    """Per-host selector that signals the page has rendered, or None for networkidle."""
+    host = urlparse(url).netloc.lower()
+    return RENDER_WAIT_SELECTORS.get(host)
+
+class BrowserPool:
+    """One Chromium per run handing out up to ``size`` pages rendered at the same time.
+
+    Each slot owns a long-lived context with request interception that aborts
+    images, fonts, media and tracker calls. Pages wait for the host's selector
+    from RENDER_WAIT_SELECTORS when configured, otherwise for networkidle.
+    The browser is launched lazily on the first render.
+    """
+
+    def __init__(self, size=RENDER_CONCURRENCY):
+        self.size = size
+        self._pw = None
+        self._browser = None
+        self._contexts = None
+        self._start_lock = asyncio.Lock()
+
+    async def _route(self, route):
+        if should_block_request(route.request.resource_type, route.request.url):
+            await route.abort()
+        else:
+            await route.continue_()
+
+    async def _start(self):
+        async with self._start_lock:
+            if self._browser is not None:
+                return
+            self._pw = await async_playwright().start()
+            self._browser = await self._pw.chromium.launch(headless=True)
+            self._contexts = asyncio.Queue()
+            for _ in range(self.size):
+                context = await self._browser.new_context(user_agent=USER_AGENT)
+                await context.route("**/*", self._route)
+                self._contexts.put_nowait(context)
+
+    async def render(self, url):
+        """Render url on a pooled context. Returns (text, final_url)."""
+        if self._browser is None:
+            await self._start()
+        context = await self._contexts.get()
+        page = None
+        try:
+            page = await context.new_page()
+            selector = wait_selector_for(url)
+            if selector:
+                await page.goto(url, timeout=REQUEST_TIMEOUT * 1000, wait_until="domcontentloaded")
+                await page.wait_for_selector(selector, timeout=REQUEST_TIMEOUT * 1000)
+            else:
+                await page.goto(url, timeout=REQUEST_TIMEOUT * 1000)
+                await page.wait_for_load_state("networkidle", timeout=REQUEST_TIMEOUT * 1000)
+            return await page.content(), page.url
+        except Exception as e:
+            logger.debug(f"Dynamic fetch failed {url}: {e}")
+            return None, url
+        finally:
+            if page is not None:
+                await page.close()
+            self._contexts.put_nowait(context)
+
+    async def close(self):
+        if self._browser is not None:
+            await self._browser.close()
+            await self._pw.stop()
+            self._browser = self._pw = self._contexts = None
+
+# -----------------------------
+# Learned static-vs-dynamic routing per host
+# -----------------------------
+def looks_usable(html):
+    """Static body is usable if it is not an empty shell waiting for JavaScript."""
+    if not html or len(html) < STATIC_MIN_BYTES:
+        return False
+    low = html.lower()
+    return "<a " in low or "<h1" in low
+
+class FetchRouter:
+    """Remembers per host whether static fetches yield usable content.
+
+    ``routes`` is a plain dict (kept in the crawler state under ``fetch_routes``)
+    mapping host -> {"render_score", "static_ok", "rendered", "since_probe"}.
+    ``render_score`` is a moving average of "static was not enough"; hosts above
+    0.5 go straight to Playwright, but every ROUTER_PROBE_EVERY-th request still
+    tries static first so the router notices when a site changes.
+    """
+
+    def __init__(self, routes=None, probe_every=ROUTER_PROBE_EVERY, alpha=0.3):
+        self.routes = routes if routes is not None else {}
+        self.probe_every = probe_every
+        self.alpha = alpha
+
+    def _route(self, host):
+        r = self.routes.get(host)
+        if r is None:
+            r = self.routes[host] = {"render_score": 0.0, "static_ok": 0, "rendered": 0, "since_probe": 0}
+        return r
+
+    def prefer_dynamic(self, url):
+        r = self._route(urlparse(url).netloc)
+        if r["render_score"] <= 0.5:
+            return False
+        r["since_probe"] += 1
+        if r["since_probe"] >= self.probe_every:
+            r["since_probe"] = 0
+            return False
+        return True
+
+    def record(self, url, static_usable):
+        r = self._route(urlparse(url).netloc)
+        r["render_score"] = (1 - self.alpha) * r["render_score"] + self.alpha * (0.0 if static_usable else 1.0)
+        r["static_ok" if static_usable else "rendered"] += 1
+
+# -----------------------------
+# Async fetch engine (many hosts at once, polite per host)
+# -----------------------------
+class AsyncFetchEngine:
+    """Concurrent replacement for fetch_static.
+
+    Requests to different hosts run in parallel; each host gets its own
+    concurrency cap and adaptive spacing from the HostRateLimiter, and a global
+    connection limit bounds the whole crawl. Hosts other workers call too are
+    also spaced through ``shared_slots`` (a SharedHostSlots) when given.
+    Use as ``async with AsyncFetchEngine() as engine``.
+    """
+
+    def __init__(self, global_limit=GLOBAL_CONNECTION_LIMIT, per_host=HOST_CONCURRENCY,
+                 limiter=None, max_retries=3, browser_pool=None, router=None, shared_slots=None):
+        self.global_limit = global_limit
+        self.per_host = per_host
+        self.limiter = limiter or rate_limiter
+        self.shared_slots = shared_slots
+        self.router = router or FetchRouter()
+        self.max_retries = max_retries
+        self.browser_pool = browser_pool or BrowserPool()
+        self._session = None
+        self._host_sems = {}
+
+    async def __aenter__(self):
+        connector = aiohttp.TCPConnector(limit=self.global_limit, limit_per_host=self.per_host, ssl=False)
+        self._session = aiohttp.ClientSession(
+            connector=connector,
+            headers={"User-Agent": USER_AGENT},
+            timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT),
+        )
+        return self
+
+    async def __aexit__(self, *exc):
+        await self._session.close()
+        await self.browser_pool.close()
+
+    async def fetch(self, url):
+        """Fetch page with aiohttp. Returns (text, final_url) like fetch_static, incl. caching."""
+        return await self._request(url)
+
+    async def fetch_json(self, url, payload=None):
+        """GET url (POST ``payload`` as JSON when given) and decode the JSON reply, or None."""
+        kind = "api"
+        if payload is not None:
+            # the same endpoint answers differently per request body (e.g. page offsets)
+            body = json.dumps(payload, sort_keys=True)
+            kind += ":" + hashlib.blake2b(body.encode("utf-8"), digest_size=8).hexdigest()
+        text, _ = await self._request(url, kind=kind, payload=payload)
+        if text is None:
+            return None
+        try:
+            return json.loads(text)
+        except ValueError as e:
+            logger.debug(f"Bad JSON from {url}: {e}")
+            return None
+
+    async def _wait_slot(self, host):
+        """Sleep until host's next slot; False if its Retry-After is longer than we wait."""
+        wait = self.limiter.reserve(host)
+        if wait is None:
+            return False
+        if self.shared_slots is not None and self.shared_slots.shares(host):
+            wait = max(wait, await asyncio.to_thread(self.shared_slots.reserve, host, self.limiter.delay(host)))
+        metrics.observe("rate_limit_wait", wait)
+        metrics.inc("crawler_host_requests_total", host=host)
+        await asyncio.sleep(wait)
+        return True
+
+    async def stream(self, url, chunk_size=64 * 1024):
+        """Yield url's raw body in chunks without buffering it (no caching, no retries)."""
+        if get_http_cache().offline:
+            return
+        host = urlparse(url).netloc
+        sem = self._host_sems.setdefault(host, asyncio.Semaphore(self.per_host))
+        async with sem:
+            if not await self._wait_slot(host):
+                return
+            started = time.monotonic()
+            try:
+                async with self._session.get(url) as r:
+                    self.limiter.record(host, status=r.status, latency=time.monotonic() - started,
+                                        retry_after=parse_retry_after(r.headers.get("Retry-After")))
+                    metrics.inc("crawler_host_responses_total", host=host, code=r.status)
+                    if r.status != 200:
+                        logger.debug(f"Stream of {url} got HTTP {r.status}")
+                        return
+                    async for chunk in r.content.iter_chunked(chunk_size):
+                        yield chunk
+            except Exception as e:
+                self.limiter.record(host, error=True)
+                metrics.inc("crawler_host_errors_total", host=host)
+                logger.debug(f"Stream failed {url}: {e}")
+
+    async def _request(self, url, kind="static", payload=None):
+        cache = get_http_cache()
+        # SQLite and zlib work happens off the event loop; a busy cache must not stall every fetch
+        cached = await asyncio.to_thread(cache.get, url, kind)
+        if cache.offline:
+            cache.stats["hits" if cached else "misses"] += 1
+            return (cached["text"], cached["final_url"]) if cached else (None, url)
+        host = urlparse(url).netloc
+        sem = self._host_sems.setdefault(host, asyncio.Semaphore(self.per_host))
+        async with sem:
+            for attempt in range(self.max_retries + 1):
+                if not await self._wait_slot(host):
+                    logger.debug(f"{host} asked us to wait too long; leaving {url} for the next run")
+                    return None, url
+                started = time.monotonic()
+                try:
+                    if payload is None:
+                        request = self._session.get(url, headers=cache.conditional_headers(cached))
+                    else:
+                        request = self._session.post(url, json=payload)
+                    async with request as r:
+                        self.limiter.record(host, status=r.status, latency=time.monotonic() - started,
+                                            retry_after=parse_retry_after(r.headers.get("Retry-After")))
+                        metrics.observe("fetch", time.monotonic() - started)
+                        metrics.inc("crawler_host_responses_total", host=host, code=r.status)
+                        if r.status in RETRY_STATUSES and attempt < self.max_retries:
+                            # the limiter has already widened this host's spacing
+                            metrics.inc("crawler_host_retries_total", host=host)
+                            continue
+                        if r.status == 304 and cached:
+                            cache.stats["revalidated"] += 1
+                            return cached["text"], cached["final_url"]
+                        r.raise_for_status()
+                        text = await r.text(errors="replace")
+                        metrics.inc("crawler_host_bytes_total", len(text), host=host)
+                        final_url, headers = str(r.url), r.headers
+                except aiohttp.ClientResponseError as e:
+                    logger.debug(f"Async fetch failed {url}: {e}")
+                    return None, url
+                except Exception as e:
+                    self.limiter.record(host, error=True)
+                    metrics.inc("crawler_host_errors_total", host=host)
+                    logger.debug(f"Async fetch failed {url}: {e}")
+                    return None, url
+                # stored outside the network handler: a cache failure is not a failed fetch
+                cache.stats["misses"] += 1
+                await asyncio.to_thread(cache.put, url, text, final_url, headers, kind)
+                return text, final_url
+        return None, url
+
+    async def fetch_dynamic(self, url):
+        """Render page on the engine's browser pool."""
+        cache = get_http_cache()
+        if cache.offline:
+            cached = await asyncio.to_thread(cache.get, url, "rendered")
+            return (cached["text"], cached["final_url"]) if cached else (None, url)
+        host = urlparse(url).netloc
+        wait = self.limiter.reserve(host)
+        if wait is None:
+            return None, url
+        await asyncio.sleep(wait)
+        metrics.inc("crawler_host_renders_total", host=host)
+        with metrics.timer("render"):
+            html, final = await self.browser_pool.render(url)
+        if html:
+            await asyncio.to_thread(cache.put, url, html, final, None, "rendered")
+        return html, final
+
+    async def fetch_with_fallback(self, url):
+        """Fetch via the route learned for url's host.
+
+        Hosts known to need rendering go straight to Playwright; otherwise static
+        first, rendering only if the content seems minimal or JS heavy.
+        """
+        if self.router.prefer_dynamic(url):
+            return await self.fetch_dynamic(url)
+        html, final = await self.fetch(url)
+        usable = looks_usable(html)
+        if html is not None:
+            # a failed request says nothing about whether the host needs JS
+            self.router.record(url, usable)
+        if not usable:
+            logger.info(f"Static fetch small or failed for {url} -> trying Playwright")
+            metrics.inc("crawler_host_render_fallbacks_total", host=urlparse(url).netloc)
+            html, final = await self.fetch_dynamic(url)
+        return html, final
+
 # -----------------------------
 # Heuristics to find job links on a careers page
 # -----------------------------
@@ -231,22 +1325,69 @@ COMMON_JOB_PATH_KEYWORDS = [
     "careers", "careers/jobs", "jobs", "careers/search", "openings", "positions", "vacancies", "opportunities"
 ]
 
-def discover_job_links(root_url, html, max_links=200):
-    """Return list of job-listing / job-detail links discovered on a career page HTML."""
+def _has_class(cls):
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {cls} ')"
+
+# compiled once; each runs against the single lxml tree built for a page
+_XP_ANCHORS = etree.XPath("//a[@href]")
+_XP_CONTAINERS = [
+    etree.XPath(f"//div[{_has_class('job-description')}]"),
+    etree.XPath(f"//div[{_has_class('job-desc')}]"),
+    etree.XPath("//div[@id='job-description']"),
+    etree.XPath(f"//div[{_has_class('description')}]"),
+    etree.XPath(f"//section[{_has_class('job')}]"),
+    etree.XPath("//article"),
+]
+_XP_LOCATIONS = [
+    etree.XPath(f"//*[{_has_class('job-location')}]"),
+    etree.XPath(f"//*[{_has_class('location')}]"),
+]
+_XP_DATES = [
+    etree.XPath(f"//*[contains(translate(@class, 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), '{attr}')]")
+    for attr in ["date-posted", "posted", "published", "date"]
+]
+BLOCK_TAGS = {"p", "div", "section", "article", "main", "td", "li", "ul", "ol", "body", "dd", "blockquote"}
+
+def parse_document(html):
+    """Parse html once with lxml; returns the document root or None.
+
+    script/style/noscript bodies are dropped up front so no later stage has to
+    skip them.
+    """
     if not html:
+        return None
+    try:
+        # lxml refuses str input carrying an XML encoding declaration
+        doc = lxml.html.document_fromstring(html.encode("utf-8") if html.lstrip().startswith("<?xml") else html)
+    except (etree.ParserError, ValueError) as e:
+        logger.debug(f"Unparseable document: {e}")
+        return None
+    etree.strip_elements(doc, "script", "style", "noscript", with_tail=False)
+    return doc
+
+def node_text(node, separator="\n"):
+    return separator.join(t.strip() for t in node.itertext() if t.strip())
+
+def discover_job_links(root_url, html, max_links=200, doc=None):
+    """Return list of job-listing / job-detail links discovered on a career page HTML.
+
+    Pass ``doc`` (from parse_document) to reuse an existing parse of ``html``.
+    """
+    if doc is None:
+        doc = parse_document(html)
+    if doc is None:
         return []
-    soup = BeautifulSoup(html, "html.parser")
-    anchors = soup.find_all("a", href=True)
     base = root_url
+    root_domain = tldextract.extract(root_url).registered_domain
     links = set()
-    for a in anchors:
-        href = a["href"].strip()
+    for a in _XP_ANCHORS(doc):
+        href = a.get("href").strip()
         if href.startswith("#") or href.lower().startswith("mailto:"):
             continue
         # make absolute
         href_abs = urljoin(base, href)
         # filter by same domain (optional)
-        if tldextract.extract(href_abs).registered_domain != tldextract.extract(root_url).registered_domain:
+        if tldextract.extract(href_abs).registered_domain != root_domain:
             continue
         # heuristic - include links with certain substrings or those likely to be job detail pages
         lower = href_abs.lower()
@@ -263,42 +1404,48 @@ def discover_job_links(root_url, html, max_links=200):
 # -----------------------------
 # Job parsing heuristics
 # -----------------------------
-def extract_text_from_soup(soup):
-    """Extract main textual content from a job detail page (simple heuristic)."""
+def extract_text_from_soup(doc):
+    """Extract main textual content from a parsed job detail page (lxml tree from parse_document)."""
     # try common containers
-    for sel in ["div.job-description", "div.job-desc", "div#job-description", "div.description", "section.job", "article"]:
-        node = soup.select_one(sel)
-        if node:
-            return node.get_text(separator="\n").strip()
-    # fallback: largest text block
-    paragraphs = soup.find_all(["p", "div", "section"])
-    best = ""
-    for p in paragraphs:
-        txt = p.get_text(separator=" ").strip()
-        if len(txt) > len(best):
-            best = txt
-    return best
+    for xp in _XP_CONTAINERS:
+        nodes = xp(doc)
+        if nodes:
+            return node_text(nodes[0])
+    # fallback: text-density scoring in one pass. Each block element scores the
+    # non-link text it holds directly (incl. inline children); its parent gets
+    # the full score and the grandparent half, so the container of many
+    # paragraphs wins over both a single paragraph and the page wrapper.
+    def block_of(el):
+        while el is not None and el.tag not in BLOCK_TAGS:
+            el = el.getparent()
+        return el
 
-def find_experience(text):
-    """Return normalized experience bucket from a job text (heuristic)."""
-    text_low = text.lower()
-    # patterns like "2+ years", "3-5 years", "0-1", "fresher", "entry level"
-    m = re.search(r'(\d+)\s*\+\s*years?', text_low)
-    if m:
-        years = int(m.group(1))
-        return bucket_from_years(years)
-    m = re.search(r'(\d+)\s*-\s*(\d+)\s*years?', text_low)
-    if m:
-        a, b = int(m.group(1)), int(m.group(2))
-        mid = (a + b) / 2.0
-        return bucket_from_years(mid)
-    m = re.search(r'(\d+)\s*years?', text_low)
-    if m:
-        yrs = int(m.group(1))
-        return bucket_from_years(yrs)
-    if "fresher" in text_low or "entry level" in text_low or "0 years" in text_low:
-        return "0"
-    return None
+    scores = {}
+    for el in doc.iter(etree.Element):
+        parent = el.getparent()
+        if el.text and el.tag != "a" and (parent is None or parent.tag != "a"):
+            block = block_of(el)
+            if block is not None:
+                scores[block] = scores.get(block, 0) + len(el.text.strip())
+        # tail text sits in the parent element
+        if el.tail and parent is not None and parent.tag != "a":
+            block = block_of(parent)
+            if block is not None:
+                scores[block] = scores.get(block, 0) + len(el.tail.strip())
+    totals = {}
+    for node, score in scores.items():
+        totals[node] = totals.get(node, 0) + score
+        parent = node.getparent()
+        if parent is not None:
+            totals[parent] = totals.get(parent, 0) + score
+            grand = parent.getparent()
+            if grand is not None:
+                totals[grand] = totals.get(grand, 0) + score / 2.0
+    best_node, best_score = None, 0.0
+    for node, score in totals.items():
+        if score > best_score and node.tag in BLOCK_TAGS:
+            best_node, best_score = node, score
+    return node_text(best_node, separator=" ") if best_node is not None else ""
 
 def bucket_from_years(years):
     if years < 1:
@@ -311,226 +1458,2619 @@ def bucket_from_years(years):
         return "4-8"
     return ">8"
 
-def match_keywords(text, keywords):
-    """Return set of keywords found (case-insensitive, whole word-ish)."""
-    found = set()
-    text_low = text.lower()
-    # sort longer first to avoid partial overlap (e.g., "node" vs "node js")
-    sorted_k = sorted(keywords, key=lambda x: -len(x))
-    for kw in sorted_k:
-        kw_low = kw.lower()
-        # basic word boundary match
-        pattern = r'\b' + re.escape(kw_low) + r'\b'
-        if re.search(pattern, text_low):
-            found.add(kw)
-    return found
-
 # -----------------------------
-# Main crawl + parse worker
+# Compiled keyword / phrase matching
 # -----------------------------
-def parse_job_page(url, html):
-    """Parse a job detail page and extract fields."""
-    if not html:
-        return None
-    soup = BeautifulSoup(html, "html.parser")
-    # title heuristics
-    title = None
-    if soup.title and soup.title.string:
-        title = soup.title.string.strip()
-    h1 = soup.find("h1")
-    if h1 and h1.get_text().strip():
-        title = h1.get_text().strip()
-    # location heuristics
-    location = None
-    for sel in ['.job-location', '.location', 'span.location', 'p.location']:
-        node = soup.select_one(sel)
-        if node:
-            location = node.get_text().strip()
-            break
-    # description
-    description = extract_text_from_soup(soup) or soup.get_text(separator="\n")
-    # posted date attempt
-    posted = None
-    for attr in ['date-posted', 'posted', 'published', 'date']:
-        node = soup.find(attrs={"class": re.compile(attr, re.I)})
-        if node:
-            try:
-                posted = dateparser.parse(node.get_text(), fuzzy=True).isoformat()
+WORK_MODE_TERMS = {
+    "remote": ["remote", "work from home"],
+    "hybrid": ["hybrid"],
+    "onsite": ["on-site", "onsite", "in-office"],
+}
+EXPERIENCE_PATTERN = (
+    r"(?P<plus>(?P<plus_n>\d+)\s*\+\s*years?)"
+    r"|(?P<range>(?P<lo>\d+)\s*-\s*(?P<hi>\d+)\s*years?)"
+    r"|(?P<plain>(?P<plain_n>\d+)\s*years?)"
+    r"|(?P<fresh>fresher|entry level)"
+)
+_EXPERIENCE_RE = re.compile(EXPERIENCE_PATTERN)
+
+def _is_word_char(ch):
+    return ch.isalnum() or ch == "_"
+
+def _keyword_trie(words):
+    trie = {}
+    for w in words:
+        node = trie
+        for ch in w:
+            node = node.setdefault(ch, {})
+        node[None] = True
+    return trie
+
+def _bounded_keywords_in(trie, text):
+    """Keywords of trie found anywhere in text, with the ``bounded`` semantics of _trie_pattern."""
+    found = []
+    for i, first in enumerate(text):
+        if i and _is_word_char(first) and _is_word_char(text[i - 1]):
+            continue
+        node = trie
+        for j in range(i, len(text)):
+            node = node.get(text[j])
+            if node is None:
                 break
-            except Exception:
-                continue
-    # experience
-    exp_bucket = find_experience(description or "")
-    # skills matching
-    backend_found = match_keywords(description or "", BACKEND_TECH_STACK)
-    frontend_found = match_keywords(description or "", FRONTEND_TECH_STACKS)
-    languages_found = match_keywords(description or "", LANGUAGES)
-    # remote / onsite
-    remote_flag = None
-    low = (title or "") + "\n" + (description or "")
-    l = low.lower()
-    if "remote" in l or "work from home" in l:
-        remote_flag = "remote"
-    elif "hybrid" in l:
-        remote_flag = "hybrid"
-    elif "on-site" in l or "onsite" in l or "in-office" in l:
-        remote_flag = "onsite"
+            if None in node and (j + 1 == len(text) or not (_is_word_char(text[j]) and _is_word_char(text[j + 1]))):
+                found.append(text[i:j + 1])
+    return found
 
-    return {
-        "url": url,
-        "title": title,
-        "location": location,
-        "posted": posted,
-        "experience_bucket": exp_bucket,
-        "backend": sorted(list(backend_found)),
-        "frontend": sorted(list(frontend_found)),
-        "languages": sorted(list(languages_found)),
-        "remote_type": remote_flag,
-        "raw_description_snippet": (description or "")[:2000]
-    }
+def _trie_pattern(words, bounded):
+    """Prefix-trie regex for words: alternatives share prefixes and prefer the longest.
 
-def crawl_careers_page(root_url, use_playwright=False, max_job_pages=200):
-    """Crawl a career root and return list of job records."""
-    logger.info(f"Crawling {root_url}")
-    if not is_allowed_by_robots(root_url):
-        logger.warning(f"Blocked by robots: {root_url}")
-        return []
+    With ``bounded`` a keyword must not touch a word character on a side where the
+    keyword itself is word-ish -- i.e. ``\\b`` semantics for ``go`` or ``next.js``,
+    while ``c++`` may be followed by anything and ``asp.net`` still yields ``.net``.
+    """
+    trie = _keyword_trie(words)
 
-    html, final = fetch_static(root_url)
-    polite_sleep()
-    job_pages = discover_job_links(root_url, html)
-    logger.info(f"Discovered {len(job_pages)} candidate job-related links from {root_url}")
+    def build(node, last):
+        branches = []
+        for ch in sorted(k for k in node if k is not None):
+            prefix = "(?<!\\w)" if bounded and last is None and _is_word_char(ch) else ""
+            branches.append(prefix + re.escape(ch) + build(node[ch], ch))
+        end = "(?!\\w)" if bounded and last is not None and _is_word_char(last) else ""
+        if None in node:
+            # longer keywords first, then stop here (regex backtracks to the shorter one)
+            branches.append(end)
+        if len(branches) == 1:
+            return branches[0]
+        return "(?:" + "|".join(branches) + ")"
 
-    results = []
-    # optionally initialize playwright browser once
-    pw_browser = None
-    if use_playwright:
-        pw = sync_playwright().start()
-        pw_browser = pw.chromium.launch(headless=True)
-    try:
-        for link in job_pages[:max_job_pages]:
-            try:
-                # prefer static fetch; if content seems minimal or JS heavy, fallback to dynamic
-                page_html, final_url = fetch_static(link)
-                polite_sleep()
-                if not page_html or len(page_html) < 500:
-                    logger.info(f"Static fetch small or failed for {link} -> trying Playwright")
-                    page_html, final_url = fetch_dynamic(link, playwright_browser=pw_browser)
-                    polite_sleep()
-                # check if this looks like a list page or single job detail
-                # if it's a list page, try to find job detail links inside and expand
-                soup = BeautifulSoup(page_html or "", "html.parser")
-                # heuristic: lots of links with job slugs -> expand
-                inner_job_links = discover_job_links(final_url, page_html, max_links=50)
-                # if page is likely a job detail (has h1 + description), parse it
-                parsed = parse_job_page(final_url, page_html)
-                if parsed and (parsed.get("title") or parsed.get("raw_description_snippet")):
-                    results.append(parsed)
-                # add discovered inner job links (parse them too)
-                for job_link in inner_job_links:
-                    if len(results) >= max_job_pages:
-                        break
-                    try:
-                        page_html2, final2 = fetch_static(job_link)
-                        polite_sleep()
-                        if not page_html2 or len(page_html2) < 500:
-                            page_html2, final2 = fetch_dynamic(job_link, playwright_browser=pw_browser)
-                            polite_sleep()
-                        parsed2 = parse_job_page(final2, page_html2)
-                        if parsed2:
-                            results.append(parsed2)
-                    except Exception as ie:
-                        logger.debug(f"failed to parse inner {job_link}: {ie}")
-                if len(results) >= max_job_pages:
-                    break
-            except Exception as e:
-                logger.warning(f"failed to crawl link {link}: {e}")
-    finally:
-        if pw_browser:
-            pw_browser.close()
-            pw.stop()
+    return build(trie, None)
 
-    logger.info(f"Crawled {len(results)} job pages under {root_url}")
-    return results
+class KeywordMatcher:
+    """All vocabularies compiled into one regex scanned once per text.
 
-# -----------------------------
-# Analytics generation
-# -----------------------------
-def compute_analytics(all_jobs):
-    stats = {
-        "total_jobs": len(all_jobs),
-        "by_backend": {},
-        "by_frontend": {},
-        "by_language": {},
-        "by_experience_bucket": {},
-        "by_remote_type": {},
-        "by_location_top": {}
-    }
-    for job in all_jobs:
-        # backend
-        for b in job.get("backend", []):
-            stats["by_backend"][b] = stats["by_backend"].get(b, 0) + 1
-        # frontend
-        for f in job.get("frontend", []):
-            stats["by_frontend"][f] = stats["by_frontend"].get(f, 0) + 1
-        # languages
-        for l in job.get("languages", []):
-            stats["by_language"][l] = stats["by_language"].get(l, 0) + 1
-        # experience
-        eb = job.get("experience_bucket") or "unspecified"
-        stats["by_experience_bucket"][eb] = stats["by_experience_bucket"].get(eb, 0) + 1
-        # remote
-        rt = job.get("remote_type") or "unspecified"
-        stats["by_remote_type"][rt] = stats["by_remote_type"].get(rt, 0) + 1
-        # location
-        loc = job.get("location") or "unspecified"
-        stats["by_location_top"][loc] = stats["by_location_top"].get(loc, 0) + 1
-
-    # optionally sort top locations
-    stats["by_location_top"] = dict(sorted(stats["by_location_top"].items(), key=lambda kv: -kv[1])[:20])
-    return stats
+    ``vocabularies`` maps category -> keywords matched on word boundaries (the
+    semantics of the old per-keyword ``\\b...\\b`` search, fixed for ``c++``/``.net``);
+    ``substring_vocabularies`` maps category -> phrases matched anywhere. The
+    pattern also carries the experience phrases, so ``scan()`` returns skills,
+    work mode hits and the experience bucket from a single pass. Keywords are
+    folded into prefix tries, so matching cost does not grow with vocabulary size.
+    """
+
+    def __init__(self, vocabularies, substring_vocabularies=None, experience=True):
+        substring_vocabularies = substring_vocabularies or {}
+        self.categories = list(vocabularies) + list(substring_vocabularies)
+        self._bounded = {}  # lowered keyword -> [(category, keyword)]
+        self._substring = {}
+        for cat, words in vocabularies.items():
+            for w in words:
+                self._bounded.setdefault(w.lower(), []).append((cat, w))
+        for cat, words in substring_vocabularies.items():
+            for w in words:
+                self._substring.setdefault(w.lower(), []).append((cat, w))
+        # a match of "spring boot" also counts as "spring", as separate searches did
+        self._implied = {}
+        trie = _keyword_trie(self._bounded)
+        for kw in self._bounded:
+            inner = [other for other in dict.fromkeys(_bounded_keywords_in(trie, kw)) if len(other) < len(kw)]
+            if inner:
+                self._implied[kw] = inner
+        parts = []
+        if experience:
+            parts.append(EXPERIENCE_PATTERN)
+        if self._bounded:
+            parts.append(f"(?P<kw>{_trie_pattern(self._bounded, True)})")
+        if self._substring:
+            parts.append(f"(?P<sub>{_trie_pattern(self._substring, False)})")
+        self.regex = re.compile("|".join(parts) or "(?!)")
+
+    def scan(self, text):
+        """Return {category: set(keywords)} plus "experience" (bucket or None)."""
+        found = {cat: set() for cat in self.categories}
+        exp = {}
+        for m in self.regex.finditer(text.lower()):
+            kind = m.lastgroup
+            if kind == "kw":
+                kw = m.group("kw")
+                for hit in [kw] + self._implied.get(kw, []):
+                    for cat, original in self._bounded[hit]:
+                        found[cat].add(original)
+            elif kind == "sub":
+                for cat, original in self._substring[m.group("sub")]:
+                    found[cat].add(original)
+            elif kind not in exp:
+                exp[kind] = m
+        found["experience"] = _experience_bucket(exp)
+        return found
+
+def _experience_bucket(first_hits):
+    # same precedence as the old sequential searches: "N+ years", "A-B years", "N years", keywords
+    m = first_hits.get("plus")
+    if m:
+        return bucket_from_years(int(m.group("plus_n")))
+    m = first_hits.get("range")
+    if m:
+        return bucket_from_years((int(m.group("lo")) + int(m.group("hi"))) / 2.0)
+    m = first_hits.get("plain")
+    if m:
+        return bucket_from_years(int(m.group("plain_n")))
+    if "fresh" in first_hits:
+        return "0"
+    return None
+
+def find_experience(text):
+    """Return normalized experience bucket from a job text (heuristic)."""
+    exp = {}
+    # patterns like "2+ years", "3-5 years", "0-1", "fresher", "entry level"
+    for m in _EXPERIENCE_RE.finditer(text.lower()):
+        exp.setdefault(m.lastgroup, m)
+    return _experience_bucket(exp)
+
+_keyword_matchers = {}
+
+def match_keywords(text, keywords):
+    """Return set of keywords found (case-insensitive, whole word-ish)."""
+    key = tuple(keywords)
+    matcher = _keyword_matchers.get(key)
+    if matcher is None:
+        matcher = _keyword_matchers[key] = KeywordMatcher({"kw": keywords}, experience=False)
+    return matcher.scan(text)["kw"]
+
+JOB_MATCHER = KeywordMatcher(
+    {"backend": BACKEND_TECH_STACK, "frontend": FRONTEND_TECH_STACKS, "languages": LANGUAGES},
+    {"work_mode": [t for terms in WORK_MODE_TERMS.values() for t in terms]},
+)
+
+def work_mode_from_hits(hits):
+    """Pick remote > hybrid > onsite from matched work-mode phrases."""
+    for mode, terms in WORK_MODE_TERMS.items():
+        if any(t in hits for t in terms):
+            return mode
+    return None
 
 # -----------------------------
-# Main orchestration
+# Date and location normalization (fast paths, memoized)
 # -----------------------------
-def load_state():
-    if STATE_FILE.exists():
-        return json.loads(STATE_FILE.read_text())
-    return {}
+MONTHS = {
+    # English
+    "jan": 1, "january": 1, "feb": 2, "february": 2, "mar": 3, "march": 3, "apr": 4, "april": 4, "may": 5,
+    "jun": 6, "june": 6, "jul": 7, "july": 7, "aug": 8, "august": 8, "sep": 9, "sept": 9, "september": 9,
+    "oct": 10, "october": 10, "nov": 11, "november": 11, "dec": 12, "december": 12,
+    # German
+    "januar": 1, "jänner": 1, "februar": 2, "märz": 3, "maerz": 3, "mai": 5, "juni": 6, "juli": 7,
+    "okt": 10, "oktober": 10, "dez": 12, "dezember": 12,
+    # French
+    "janvier": 1, "janv": 1, "février": 2, "fevrier": 2, "févr": 2, "mars": 3, "avril": 4, "avr": 4, "juin": 6,
+    "juillet": 7, "juil": 7, "août": 8, "aout": 8, "septembre": 9, "octobre": 10, "novembre": 11,
+    "décembre": 12, "decembre": 12, "déc": 12,
+    # Spanish
+    "enero": 1, "ene": 1, "febrero": 2, "marzo": 3, "abril": 4, "abr": 4, "mayo": 5, "junio": 6, "julio": 7,
+    "agosto": 8, "ago": 8, "septiembre": 9, "setiembre": 9, "octubre": 10, "noviembre": 11, "diciembre": 12,
+    "dic": 12,
+}
+RELATIVE_UNIT_DAYS = {"minute": 0, "min": 0, "hour": 0, "hr": 0, "day": 1, "week": 7, "month": 30, "year": 365}
+_DATE_RELATIVE_RE = re.compile(r"\b(\d+|an?|one)\s*\+?\s*(minute|min|hour|hr|day|week|month|year)s?\s+ago\b")
+_DATE_TODAY_RE = re.compile(r"\b(today|just now|just posted|yesterday)\b")
+_DATE_ISO_RE = re.compile(r"\b(\d{4})-(\d{1,2})-(\d{1,2})\b")
+_DATE_DAY_MONTH_RE = re.compile(r"\b(\d{1,2})(?:st|nd|rd|th)?\.?[\s/-]+([a-zà-ü]{3,9})\.?,?[\s/-]+(\d{4})\b")
+_DATE_MONTH_DAY_RE = re.compile(r"\b([a-zà-ü]{3,9})\.?\s+(\d{1,2})(?:st|nd|rd|th)?,?\s+(\d{4})\b")
+_DATE_NUMERIC_RE = re.compile(r"\b(\d{1,2})([./])(\d{1,2})\2(\d{4})\b")
 
-def save_state(state):
-    STATE_FILE.write_text(json.dumps(state, indent=2))
+def _iso_day(d):
+    return datetime(d.year, d.month, d.day).isoformat()
 
-def main(careers_list, use_playwright=False):
-    state = load_state()
-    aggregated_jobs = []
-    for root in careers_list:
-        try:
-            if root in state.get("completed", []):
-                logger.info(f"Skipping already processed {root}")
-                continue
-            jobs = crawl_careers_page(root, use_playwright=use_playwright)
-            # tag company domain
-            for j in jobs:
-                j["company_root"] = root
-            aggregated_jobs.extend(jobs)
-            # persist incremental
-            state.setdefault("completed", []).append(root)
-            state.setdefault("jobs", []).extend(jobs)
-            save_state(state)
-        except Exception as e:
-            logger.exception(f"Error crawling {root}: {e}")
+def _fast_date(text, today):
+    """Date for the common shapes of posted-date text, or None; text is lower-cased.
+
+    Absolute dates are tried first, so "Apply today - posted 2024-01-02" is the
+    2nd of January rather than the crawl day.
+    """
+    m = _DATE_ISO_RE.search(text)
+    if m:
+        return datetime(int(m.group(1)), int(m.group(2)), int(m.group(3))).isoformat()
+    m = _DATE_DAY_MONTH_RE.search(text)
+    if m and m.group(2) in MONTHS:
+        return datetime(int(m.group(3)), MONTHS[m.group(2)], int(m.group(1))).isoformat()
+    m = _DATE_MONTH_DAY_RE.search(text)
+    if m and m.group(1) in MONTHS:
+        return datetime(int(m.group(3)), MONTHS[m.group(1)], int(m.group(2))).isoformat()
+    m = _DATE_NUMERIC_RE.search(text)
+    if m:
+        a, b, year = int(m.group(1)), int(m.group(3)), int(m.group(4))
+        # 05.03.2024 is day-first everywhere it is written; 05/03/2024 is read month-first, like dateutil
+        day, month = (a, b) if m.group(2) == "." or a > 12 else (b, a)
+        return datetime(year, month, day).isoformat()
+    m = _DATE_RELATIVE_RE.search(text)
+    if m:
+        n = int(m.group(1)) if m.group(1).isdigit() else 1
+        return _iso_day(datetime.fromordinal(today.toordinal() - n * RELATIVE_UNIT_DAYS[m.group(2)]))
+    m = _DATE_TODAY_RE.search(text)
+    if m:
+        return _iso_day(datetime.fromordinal(today.toordinal() - (m.group(1) == "yesterday")))
+    return None
+
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def _parse_date_text(text, today):
+    # today is part of the key so "3 days ago" is not served from yesterday's cache
+    try:
+        return datetime.fromisoformat(text.replace("Z", "+00:00")).isoformat()
+    except ValueError:
+        pass
+    try:
+        return _fast_date(text.lower(), today) or dateparser.parse(text, fuzzy=True).isoformat()
+    except (OverflowError, ValueError):
+        return None
+
+def parse_date_text(text):
+    """ISO timestamp from posted-date text ("2024-03-05", "Posted 3 days ago", "5 März 2024"); None if none.
+
+    Compiled patterns cover ISO, relative and day/month-name dates; only other
+    text reaches dateutil's fuzzy parser. Results are memoized per day.
+    """
+    text = " ".join(str(text).split())[:DATE_TEXT_MAX]
+    if not text:
+        return None
+    return _parse_date_text(text, datetime.now(timezone.utc).date())
+
+# canonical city -> (country, aliases); aliases are lower-case, dots removed
+CITY_GAZETTEER = {
+    "Bengaluru": ("India", ["bangalore", "bengaluru", "bengaluru urban", "blr"]),
+    "Hyderabad": ("India", ["hyderabad", "secunderabad"]),
+    "Chennai": ("India", ["chennai", "madras"]),
+    "Mumbai": ("India", ["mumbai", "bombay", "navi mumbai"]),
+    "Pune": ("India", ["pune", "poona"]),
+    "New Delhi": ("India", ["delhi", "new delhi", "delhi ncr", "ncr"]),
+    "Gurugram": ("India", ["gurgaon", "gurugram"]),
+    "Noida": ("India", ["noida", "greater noida"]),
+    "Kolkata": ("India", ["kolkata", "calcutta"]),
+    "Ahmedabad": ("India", ["ahmedabad"]),
+    "Kochi": ("India", ["kochi", "cochin"]),
+    "Thiruvananthapuram": ("India", ["thiruvananthapuram", "trivandrum"]),
+    "Jaipur": ("India", ["jaipur"]),
+    "Coimbatore": ("India", ["coimbatore"]),
+    "Mysuru": ("India", ["mysuru", "mysore"]),
+    "Chandigarh": ("India", ["chandigarh", "mohali"]),
+    "Indore": ("India", ["indore"]),
+    "Nagpur": ("India", ["nagpur"]),
+    "Lucknow": ("India", ["lucknow"]),
+    "Bhubaneswar": ("India", ["bhubaneswar"]),
+    "Vadodara": ("India", ["vadodara", "baroda"]),
+    "Visakhapatnam": ("India", ["visakhapatnam", "vizag"]),
+    "San Francisco": ("United States", ["san francisco", "sf", "san francisco bay area", "bay area"]),
+    "New York": ("United States", ["new york", "new york city", "nyc", "manhattan", "brooklyn"]),
+    "Seattle": ("United States", ["seattle"]),
+    "Redmond": ("United States", ["redmond"]),
+    "Mountain View": ("United States", ["mountain view"]),
+    "Sunnyvale": ("United States", ["sunnyvale"]),
+    "San Jose": ("United States", ["san jose"]),
+    "Palo Alto": ("United States", ["palo alto"]),
+    "Menlo Park": ("United States", ["menlo park"]),
+    "Cupertino": ("United States", ["cupertino"]),
+    "Los Angeles": ("United States", ["los angeles"]),
+    "Austin": ("United States", ["austin"]),
+    "Boston": ("United States", ["boston", "cambridge ma"]),
+    "Chicago": ("United States", ["chicago"]),
+    "Denver": ("United States", ["denver"]),
+    "Atlanta": ("United States", ["atlanta"]),
+    "Washington": ("United States", ["washington dc", "washington d c", "dc"]),
+    "London": ("United Kingdom", ["london", "greater london"]),
+    "Manchester": ("United Kingdom", ["manchester"]),
+    "Edinburgh": ("United Kingdom", ["edinburgh"]),
+    "Dublin": ("Ireland", ["dublin"]),
+    "Berlin": ("Germany", ["berlin"]),
+    "Munich": ("Germany", ["munich", "münchen", "muenchen"]),
+    "Hamburg": ("Germany", ["hamburg"]),
+    "Frankfurt": ("Germany", ["frankfurt", "frankfurt am main"]),
+    "Amsterdam": ("Netherlands", ["amsterdam"]),
+    "Paris": ("France", ["paris"]),
+    "Zurich": ("Switzerland", ["zurich", "zürich"]),
+    "Warsaw": ("Poland", ["warsaw", "warszawa"]),
+    "Krakow": ("Poland", ["krakow", "kraków", "cracow"]),
+    "Prague": ("Czechia", ["prague", "praha"]),
+    "Barcelona": ("Spain", ["barcelona"]),
+    "Madrid": ("Spain", ["madrid"]),
+    "Lisbon": ("Portugal", ["lisbon", "lisboa"]),
+    "Stockholm": ("Sweden", ["stockholm"]),
+    "Copenhagen": ("Denmark", ["copenhagen", "københavn"]),
+    "Tel Aviv": ("Israel", ["tel aviv", "tel aviv-yafo"]),
+    "Dubai": ("United Arab Emirates", ["dubai"]),
+    "Singapore": ("Singapore", ["singapore"]),
+    "Tokyo": ("Japan", ["tokyo"]),
+    "Seoul": ("South Korea", ["seoul"]),
+    "Beijing": ("China", ["beijing", "peking"]),
+    "Shanghai": ("China", ["shanghai"]),
+    "Shenzhen": ("China", ["shenzhen"]),
+    "Hong Kong": ("Hong Kong", ["hong kong", "hk"]),
+    "Sydney": ("Australia", ["sydney"]),
+    "Melbourne": ("Australia", ["melbourne"]),
+    "Toronto": ("Canada", ["toronto"]),
+    "Vancouver": ("Canada", ["vancouver"]),
+    "Montreal": ("Canada", ["montreal", "montréal"]),
+    "São Paulo": ("Brazil", ["são paulo", "sao paulo"]),
+    "Mexico City": ("Mexico", ["mexico city", "ciudad de méxico", "ciudad de mexico", "cdmx"]),
+}
+COUNTRY_ALIASES = {
+    "United States": ["united states", "united states of america", "usa", "us", "u s", "america"],
+    "United Kingdom": ["united kingdom", "uk", "gb", "great britain", "england", "scotland", "wales"],
+    "India": ["india", "in", "ind", "bharat"],
+    "Germany": ["germany", "deutschland", "de"],
+    "Ireland": ["ireland", "ie"],
+    "Netherlands": ["netherlands", "the netherlands", "holland", "nl"],
+    "France": ["france", "fr"],
+    "Switzerland": ["switzerland", "schweiz", "suisse", "ch"],
+    "Poland": ["poland", "polska", "pl"],
+    "Czechia": ["czechia", "czech republic", "cz"],
+    "Spain": ["spain", "españa", "es"],
+    "Portugal": ["portugal", "pt"],
+    "Sweden": ["sweden", "se"],
+    "Denmark": ["denmark", "dk"],
+    "Israel": ["israel", "il"],
+    "United Arab Emirates": ["united arab emirates", "uae", "ae"],
+    "Singapore": ["singapore", "sg"],
+    "Japan": ["japan", "jp"],
+    "South Korea": ["south korea", "korea", "republic of korea", "kr"],
+    "China": ["china", "prc", "cn"],
+    "Hong Kong": ["hong kong sar"],
+    "Australia": ["australia", "au"],
+    "Canada": ["canada", "ca"],
+    "Brazil": ["brazil", "brasil", "br"],
+    "Mexico": ["mexico", "méxico", "mx"],
+}
+# regions that only tell us the country; a code claimed by two countries ("in": Indiana or India,
+# "tn": Tennessee or Tamil Nadu) is only resolved by the rest of the location
+REGION_COUNTRIES = {
+    "United States": [
+        "al", "ak", "az", "ar", "ca", "co", "ct", "de", "fl", "ga", "hi", "id", "il", "in", "ia", "ks", "ky", "la",
+        "me", "md", "ma", "mi", "mn", "ms", "mo", "mt", "ne", "nv", "nh", "nj", "nm", "ny", "nc", "nd", "oh", "ok",
+        "or", "pa", "ri", "sc", "sd", "tn", "tx", "ut", "vt", "va", "wa", "wv", "wi", "wy",
+        "alabama", "alaska", "arizona", "arkansas", "california", "colorado", "connecticut", "delaware",
+        "florida", "georgia", "hawaii", "idaho", "illinois", "indiana", "iowa", "kansas", "kentucky",
+        "louisiana", "maine", "maryland", "massachusetts", "michigan", "minnesota", "mississippi", "missouri",
+        "montana", "nebraska", "nevada", "new hampshire", "new jersey", "new mexico", "north carolina",
+        "north dakota", "ohio", "oklahoma", "oregon", "pennsylvania", "rhode island", "south carolina",
+        "south dakota", "tennessee", "texas", "utah", "vermont", "virginia", "washington", "west virginia",
+        "wisconsin", "wyoming",
+    ],
+    "India": ["karnataka", "ka", "telangana", "tamil nadu", "tn", "maharashtra", "mh", "haryana", "hr",
+              "uttar pradesh", "up", "west bengal", "gujarat", "kerala", "rajasthan"],
+    "Canada": ["ontario", "on", "british columbia", "bc", "quebec", "québec", "qc", "alberta", "ab"],
+    "Germany": ["bavaria", "bayern", "hesse", "hessen"],
+}
+REMOTE_TERMS = {"remote", "fully remote", "remote first", "anywhere", "work from home", "wfh", "virtual",
+                "telecommute", "distributed"}
+LOCATION_NOISE = {"hybrid", "onsite", "on-site", "on site", "in office", "office", "hq", "headquarters"}
+
+def _build_places():
+    claims = {}
+    for region_country, regions in REGION_COUNTRIES.items():
+        for alias in regions:
+            claims.setdefault(alias, {}).setdefault(region_country, "region")
+    for country, aliases in COUNTRY_ALIASES.items():
+        for alias in aliases + [country.lower()]:
+            claims.setdefault(alias, {}).setdefault(country, "country")
+    places = {}
+    for alias, countries in claims.items():
+        if len(countries) == 1:
+            [(country, kind)] = countries.items()
+            places[alias] = (kind, country)
+        else:
+            places[alias] = ("ambiguous", tuple(countries))
+    for city, (country, aliases) in CITY_GAZETTEER.items():
+        for alias in aliases:
+            # a city name beats a same-named region ("washington dc" vs the state)
+            places[alias] = ("city", f"{city}, {country}")
+    return places
+
+_PLACES = _build_places()
+_LOCATION_SPLIT_RE = re.compile(r"\s*(?:;|\||\n|\s/\s|\bor\b)\s*")
+_LOCATION_PART_RE = re.compile(r"\s*(?:,|\(|\)|\s[-–—]\s|:)\s*")
+_LOCATION_LABEL_RE = re.compile(r"^(?:job\s+)?locations?\s*[:\-]?\s*", re.I)
+_REMOTE_PREFIX_RE = re.compile(r"^remote\b[\s-]*(?:(?:in|from|within|across|only)\s+)?(?:the\s+)?")
+
+def _canonical_place(text):
+    city = country = first = None
+    remote = False
+    ambiguous = []
+    for token in _LOCATION_PART_RE.split(text):
+        key = token.lower().replace(".", "").strip()
+        if not key or key in LOCATION_NOISE:
+            continue
+        if key in REMOTE_TERMS:
+            remote = True
+            continue
+        if key.startswith("remote"):
+            remote = True
+            # "Remote in India", "Remote US": a known place after the marker still counts
+            key = _REMOTE_PREFIX_RE.sub("", key)
+            if key not in _PLACES:
+                continue
+        kind, name = _PLACES.get(key, (None, None))
+        if kind == "city" and city is None:
+            city = name
+        elif kind in ("country", "region") and country is None:
+            country = name
+        elif kind == "ambiguous":
+            ambiguous.append((token, name))
+        elif kind is None and first is None:
+            first = token
+    if city:
+        country = city.rsplit(", ", 1)[1]
+    if country is None and ambiguous:
+        # nothing else says which country is meant: keep the code as written
+        code = ambiguous[0][0]
+        return f"Remote, {code}" if remote else text
+    if remote:
+        return f"Remote, {country}" if country else "Remote"
+    if city:
+        return city
+    if country:
+        # a town we do not know, in a country we do: keep the town, normalize the country
+        return f"{first}, {country}" if first else country
+    return text
+
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def _canonical_location(text):
+    places = []
+    for part in _LOCATION_SPLIT_RE.split(_LOCATION_LABEL_RE.sub("", text)):
+        place = _canonical_place(part) if part else None
+        if place and place not in places:
+            places.append(place)
+    return "; ".join(places) or None
+
+def canonical_location(raw):
+    """Gazetteer-normalized location: "Bangalore, IN" and "Bengaluru, Karnataka" -> "Bengaluru, India".
+
+    Known cities become "City, Country", remote markers "Remote[, Country]";
+    several locations are normalized one by one and joined with "; ". A code
+    two countries share ("IN", "CA") needs a city or country beside it. Text
+    with no known place is returned whitespace-collapsed. Memoized.
+    """
+    if not raw:
+        return raw
+    return _canonical_location(" ".join(str(raw).split())[:LOCATION_TEXT_MAX])
+
+# -----------------------------
+# Main crawl + parse worker
+# -----------------------------
+_JSONLD_RE = re.compile(r"<script[^>]+application/ld\+json[^>]*>(.*?)</script>", re.S | re.I)
+REMOTE_LOCATION_TYPES = {"TELECOMMUTE": "remote"}
+
+def html_fragment_text(fragment):
+    """Plain text of an HTML snippet, e.g. a JSON-LD or ATS job description."""
+    if not fragment:
+        return ""
+    if "&lt;" in fragment:
+        # some feeds escape the markup a second time
+        fragment = unescape(fragment)
+    try:
+        return node_text(lxml.html.fragment_fromstring(fragment, create_parent="div"))
+    except (etree.ParserError, ValueError):
+        return fragment
+
+def normalize_posted(value):
+    """ISO timestamp from an ISO string, epoch (s or ms) or free-form date text; None if unparseable."""
+    if value in (None, ""):
+        return None
+    try:
+        if isinstance(value, (int, float)):
+            return datetime.fromtimestamp(value / 1000 if value > 1e11 else value, timezone.utc).isoformat()
+        return parse_date_text(value)
+    except (OverflowError, OSError, ValueError):
+        return None
+
+def _walk_jsonld(node):
+    if isinstance(node, list):
+        for item in node:
+            yield from _walk_jsonld(item)
+    elif isinstance(node, dict):
+        yield node
+        if "@graph" in node:
+            yield from _walk_jsonld(node["@graph"])
+
+def _jsonld_location(value):
+    parts = []
+    for place in value if isinstance(value, list) else [value]:
+        address = place.get("address", place) if isinstance(place, dict) else place
+        if isinstance(address, str):
+            parts.append(address)
+            continue
+        if not isinstance(address, dict):
+            continue
+        fields = [address.get(k) for k in ("addressLocality", "addressRegion", "addressCountry")]
+        fields = [f.get("name") if isinstance(f, dict) else f for f in fields]
+        text = ", ".join(f for f in fields if isinstance(f, str) and f.strip())
+        if text:
+            parts.append(text)
+    return "; ".join(parts) or None
+
+def jsonld_job_fields(html):
+    """Fields of the first schema.org JobPosting embedded as JSON-LD in html, or None."""
+    for block in _JSONLD_RE.findall(html):
+        try:
+            data = json.loads(block, strict=False)
+        except ValueError:
+            continue
+        for node in _walk_jsonld(data):
+            types = node.get("@type")
+            if "JobPosting" not in (types if isinstance(types, list) else [types]):
+                continue
+            loc_type = node.get("jobLocationType")
+            return {
+                "title": (node.get("title") or "").strip() or None,
+                "location": _jsonld_location(node.get("jobLocation") or []),
+                "posted": normalize_posted(node.get("datePosted")),
+                "description": html_fragment_text(node.get("description")),
+                "remote_type": REMOTE_LOCATION_TYPES.get(loc_type.upper()) if isinstance(loc_type, str) else None,
+            }
+    return None
+
+def job_record(url, title=None, location=None, posted=None, description="", remote_type=None, source="html"):
+    """Build the job dict from extracted fields: skills, experience, work mode and fingerprint."""
+    # skills, experience and work mode in one scan of the description
+    hits = JOB_MATCHER.scan(description or "")
+    # remote / onsite (title counts too); an explicit remote_type from structured data wins
+    work_hits = hits["work_mode"] | JOB_MATCHER.scan(title or "")["work_mode"]
+    # fingerprint for change detection / near-duplicate merging
+    content_hash, sim = content_fingerprint(description)
+    return {
+        "url": url,
+        "title": title,
+        "location": canonical_location(location),
+        "posted": posted,
+        "experience_bucket": hits["experience"],
+        "backend": sorted(hits["backend"]),
+        "frontend": sorted(hits["frontend"]),
+        "languages": sorted(hits["languages"]),
+        "remote_type": remote_type or work_mode_from_hits(work_hits),
+        "raw_description_snippet": (description or "")[:2000],
+        "content_hash": content_hash,
+        "simhash": sim,
+        "source": source,
+    }
+
+def parse_job_page(url, html, doc=None):
+    """Parse a job detail page and extract fields.
+
+    A schema.org JobPosting in JSON-LD is used when present; the HTML
+    heuristics below only run if it lacks a title or description.
+    Pass ``doc`` (from parse_document) to reuse an existing parse of ``html``.
+    """
+    if not html:
+        return None
+    fields = jsonld_job_fields(html)
+    if fields and fields["title"] and fields["description"]:
+        return job_record(url, source="jsonld", **fields)
+    if doc is None:
+        doc = parse_document(html)
+    if doc is None:
+        return None
+    # title heuristics
+    title = None
+    node = doc.find(".//title")
+    if node is not None and node.text:
+        title = node.text.strip()
+    h1 = doc.find(".//h1")
+    if h1 is not None and h1.text_content().strip():
+        title = h1.text_content().strip()
+    # location heuristics
+    location = None
+    for xp in _XP_LOCATIONS:
+        nodes = xp(doc)
+        if nodes:
+            location = nodes[0].text_content().strip()
+            break
+    # description
+    description = extract_text_from_soup(doc) or node_text(doc)
+    # posted date attempt
+    posted = None
+    for xp in _XP_DATES:
+        nodes = xp(doc)
+        if nodes:
+            posted = parse_date_text(nodes[0].text_content())
+            if posted:
+                break
+    if fields:
+        # partial JSON-LD still beats the heuristics field by field
+        title = fields["title"] or title
+        location = fields["location"] or location
+        posted = fields["posted"] or posted
+        description = fields["description"] or description
+        return job_record(url, title, location, posted, description, fields["remote_type"], source="jsonld")
+    return job_record(url, title, location, posted, description)
+
+# -----------------------------
+# Parsing stage (process pool behind a bounded queue)
+# -----------------------------
+class ParseStage:
+    """Runs CPU-bound parsing in a ProcessPoolExecutor, decoupled from network I/O.
+
+    Fetch tasks ``await submit(fn, *args)``; the call blocks while the bounded
+    queue is full (backpressure on fetchers) and resolves with ``fn``'s result
+    once one of the consumer tasks has run it in the pool. ``fn`` must be a
+    module-level function (picklable), e.g. process_page or parse_job_page.
+    ``workers=0`` parses inline on the event loop, which is handy for debugging.
+    """
+
+    def __init__(self, workers=PARSE_WORKERS, queue_size=PARSE_QUEUE_SIZE):
+        self.workers = workers
+        self.queue_size = queue_size
+        self._pool = None
+        self._queue = None
+        self._consumers = []
+
+    async def __aenter__(self):
+        if self.workers > 0:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+            self._queue = asyncio.Queue(maxsize=self.queue_size)
+            self._consumers = [asyncio.create_task(self._consume()) for _ in range(self.workers)]
+        return self
+
+    async def __aexit__(self, *exc):
+        if self._pool is not None:
+            for _ in self._consumers:
+                await self._queue.put(None)
+            await asyncio.gather(*self._consumers)
+            self._pool.shutdown(wait=True)
+            self._pool = None
+
+    async def _consume(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            item = await self._queue.get()
+            if item is None:
+                return
+            fn, args, fut, queued_at = item
+            metrics.set_gauge("crawler_parse_queue_depth", self._queue.qsize())
+            started = time.perf_counter()
+            metrics.observe("parse_queue_wait", started - queued_at)
+            try:
+                result = await loop.run_in_executor(self._pool, fn, *args)
+                metrics.observe("parse", time.perf_counter() - started)
+                if not fut.cancelled():
+                    fut.set_result(result)
+            except Exception as e:
+                if not fut.cancelled():
+                    fut.set_exception(e)
+
+    async def submit(self, fn, *args):
+        if self._pool is None:
+            with metrics.timer("parse"):
+                return fn(*args)
+        fut = asyncio.get_running_loop().create_future()
+        await self._queue.put((fn, args, fut, time.perf_counter()))
+        metrics.set_gauge("crawler_parse_queue_depth", self._queue.qsize())
+        return await fut
+
+def process_page(url, html, max_links=50, known_hash=None, links=True):
+    """Single-parse page pipeline: returns (page hash, job record or None, inner job links).
+
+    The job is not re-extracted when the page hash equals ``known_hash`` (the
+    hash recorded at the last crawl); links are only discovered with ``links``.
+    Hashing here rather than in a task of its own ships each page to the
+    parser pool once.
+    """
+    if not html:
+        return None, None, []
+    digest = page_hash(html)
+    doc = None
+    if links:
+        doc = parse_document(html)
+        if doc is None:
+            return digest, None, []
+    parsed = parse_job_page(url, html, doc=doc) if digest != known_hash else None
+    return digest, parsed, discover_job_links(url, html, max_links=max_links, doc=doc) if links else []
+
+# -----------------------------
+# ATS adapters (bulk job listings from JSON APIs)
+# -----------------------------
+WORKPLACE_TYPES = {"remote": "remote", "hybrid": "hybrid", "onsite": "onsite", "on-site": "onsite"}
+
+def job_from_listing(listing):
+    """Job record from an ATS listing dict (url, title, location, posted, description html, remote_type, source)."""
+    return job_record(
+        listing["url"],
+        (listing.get("title") or "").strip() or None,
+        listing.get("location"),
+        normalize_posted(listing.get("posted")),
+        html_fragment_text(listing.get("description")),
+        listing.get("remote_type"),
+        source=listing["source"],
+    )
+
+class AtsAdapter:
+    """Pulls every posting of one ATS-hosted job board from the vendor's JSON API.
+
+    Subclasses set ``name`` and ``url_re`` (matched against the careers URL and
+    any links in its HTML) and implement ``listings(engine)``, an async
+    generator of listing dicts for job_from_listing. Requests go through the
+    engine, so they are rate limited and cached like page fetches.
+    """
+
+    name = None
+    url_re = None
+
+    def __init__(self, board_url, match):
+        self.board_url = board_url
+        self.match = match
+        parts = urlparse(board_url)
+        self.api_base = (ATS_API_BASES.get(self.name) or f"{parts.scheme}://{parts.netloc}").rstrip("/")
+        self.failures = 0  # API requests that got no answer; the listing may be incomplete
+
+    async def fetch_json(self, engine, url, payload=None):
+        data = await engine.fetch_json(url, payload=payload)
+        if data is None:
+            self.failures += 1
+        return data
+
+    def listing(self, url, title, location=None, posted=None, description="", remote_type=None):
+        return {"url": url, "title": title, "location": location, "posted": posted,
+                "description": description, "remote_type": remote_type, "source": self.name}
+
+class GreenhouseAdapter(AtsAdapter):
+    name = "greenhouse"
+    url_re = re.compile(r"(?:job-)?boards(?:\.eu)?\.greenhouse\.io/(?:embed/job_board(?:/js)?\?for=)?([\w-]+)")
+
+    async def listings(self, engine):
+        # one request returns the whole board, descriptions included
+        data = await self.fetch_json(engine, f"{self.api_base}/v1/boards/{self.match.group(1)}/jobs?content=true")
+        for job in (data or {}).get("jobs", []):
+            yield self.listing(job.get("absolute_url"), job.get("title"), (job.get("location") or {}).get("name"),
+                               job.get("first_published") or job.get("updated_at"), job.get("content"))
+
+class LeverAdapter(AtsAdapter):
+    name = "lever"
+    url_re = re.compile(r"jobs\.lever\.co/([\w.-]+)")
+
+    async def listings(self, engine):
+        skip = 0
+        while True:
+            page = await self.fetch_json(
+                engine, f"{self.api_base}/v0/postings/{self.match.group(1)}?mode=json&skip={skip}&limit={ATS_PAGE_SIZE}")
+            if not isinstance(page, list) or not page:
+                return
+            for post in page:
+                sections = "".join(f"<h3>{sec.get('text', '')}</h3><ul>{sec.get('content', '')}</ul>"
+                                   for sec in post.get("lists") or [])
+                description = (post.get("description") or "") + sections + (post.get("additional") or "")
+                yield self.listing(post.get("hostedUrl"), post.get("text"),
+                                   (post.get("categories") or {}).get("location"), post.get("createdAt"),
+                                   description, WORKPLACE_TYPES.get(post.get("workplaceType")))
+            if len(page) < ATS_PAGE_SIZE:
+                return
+            skip += ATS_PAGE_SIZE
+
+class SmartRecruitersAdapter(AtsAdapter):
+    name = "smartrecruiters"
+    url_re = re.compile(r"(?:careers|jobs)\.smartrecruiters\.com/([\w-]+)")
+
+    async def _detail(self, engine, company, post):
+        # the postings list carries no description; the per-posting call does
+        detail = await self.fetch_json(engine, f"{self.api_base}/v1/companies/{company}/postings/{post['id']}") or {}
+        sections = ((detail.get("jobAd") or {}).get("sections") or {}).values()
+        loc = post.get("location") or {}
+        return self.listing(
+            detail.get("postingUrl") or f"https://jobs.smartrecruiters.com/{company}/{post['id']}",
+            post.get("name"),
+            ", ".join(loc[k] for k in ("city", "region", "country") if loc.get(k)) or None,
+            post.get("releasedDate"),
+            "".join(f"<h3>{sec.get('title', '')}</h3>{sec.get('text', '')}" for sec in sections if isinstance(sec, dict)),
+            "remote" if loc.get("remote") else None,
+        )
+
+    async def listings(self, engine):
+        company, offset = self.match.group(1), 0
+        while True:
+            data = await self.fetch_json(
+                engine, f"{self.api_base}/v1/companies/{company}/postings?limit={ATS_PAGE_SIZE}&offset={offset}") or {}
+            posts = data.get("content") or []
+            for item in await asyncio.gather(*(self._detail(engine, company, p) for p in posts)):
+                yield item
+            offset += len(posts)
+            if not posts or offset >= data.get("totalFound", 0):
+                return
+
+class WorkdayAdapter(AtsAdapter):
+    name = "workday"
+    url_re = re.compile(r"([\w-]+)\.(wd\d+)\.myworkdayjobs\.com/(?:[a-z]{2}-[A-Z]{2}/)?([\w-]+)")
+    page_size = 20  # the CXS endpoint rejects larger pages
+
+    async def listings(self, engine):
+        tenant, _, site = self.match.groups()
+        endpoint = f"{self.api_base}/wday/cxs/{tenant}/{site}"
+        offset = 0
+        while True:
+            data = await self.fetch_json(engine, f"{endpoint}/jobs", payload={
+                "appliedFacets": {}, "limit": self.page_size, "offset": offset, "searchText": ""}) or {}
+            posts = data.get("jobPostings") or []
+            details = await asyncio.gather(*(self.fetch_json(engine, endpoint + p["externalPath"]) for p in posts))
+            for post, detail in zip(posts, details):
+                info = (detail or {}).get("jobPostingInfo") or {}
+                yield self.listing(
+                    info.get("externalUrl") or f"https://{urlparse(self.board_url).netloc}/{site}{post['externalPath']}",
+                    info.get("title") or post.get("title"),
+                    info.get("location") or post.get("locationsText"),
+                    info.get("startDate"),
+                    info.get("jobDescription"),
+                    WORKPLACE_TYPES.get((info.get("remoteType") or "").lower()),
+                )
+            # later pages report total=0, so stop on a short page instead
+            if len(posts) < self.page_size:
+                return
+            offset += len(posts)
+
+class EightfoldAdapter(AtsAdapter):
+    name = "eightfold"
+    url_re = re.compile(r"([\w-]+)\.eightfold\.ai/careers")
+
+    async def listings(self, engine):
+        domain = dict(parse_qsl(urlparse(self.board_url).query)).get("domain") or f"{self.match.group(1)}.com"
+        start = 0
+        while True:
+            data = await self.fetch_json(
+                engine, f"{self.api_base}/api/apply/v2/jobs?domain={domain}&start={start}&num={ATS_PAGE_SIZE}") or {}
+            posts = data.get("positions") or []
+            for post in posts:
+                description = post.get("job_description")
+                if not description:
+                    detail = await self.fetch_json(
+                        engine, f"{self.api_base}/api/apply/v2/jobs/{post['id']}?domain={domain}") or {}
+                    description = detail.get("job_description")
+                yield self.listing(
+                    post.get("canonicalPositionUrl") or f"https://{urlparse(self.board_url).netloc}/careers/job/{post['id']}",
+                    post.get("name"), post.get("location"), post.get("t_create"), description,
+                    WORKPLACE_TYPES.get((post.get("work_location_option") or "").lower()),
+                )
+            start += len(posts)
+            if not posts or start >= data.get("count", 0):
+                return
+
+ATS_ADAPTERS = [GreenhouseAdapter, LeverAdapter, SmartRecruitersAdapter, WorkdayAdapter, EightfoldAdapter]
+
+def detect_ats(url, html=None):
+    """Adapter for the ATS behind a careers URL, or behind a board linked or embedded in its html."""
+    for cls in ATS_ADAPTERS:
+        m = cls.url_re.search(url)
+        if m:
+            return cls(url, m)
+    for cls in ATS_ADAPTERS:
+        m = cls.url_re.search(html or "")
+        if m:
+            return cls("https://" + m.group(0), m)
+    return None
+
+async def crawl_ats(adapter, engine, parse_stage, on_job, max_jobs, archive=None, root=None):
+    """Feed up to max_jobs postings from adapter through parse_stage to on_job; returns how many.
+
+    With a PageArchive, each posting's listing JSON is archived under ``root``.
+    """
+    count = 0
+    listings = adapter.listings(engine)
+    try:
+        async for listing in listings:
+            if not listing["url"]:
+                continue
+            if archive is not None:
+                archive.put(listing["url"], json.dumps(listing), root=root, kind="ats")
+            on_job(await parse_stage.submit(job_from_listing, listing))
+            count += 1
+            if count >= max_jobs:
+                break
+    finally:
+        await listings.aclose()
+    return count
+
+# -----------------------------
+# Sitemap discovery (streamed, lastmod-aware)
+# -----------------------------
+SITEMAP_JOB_URL_RE = re.compile(
+    r"/(jobs?|careers?|positions?|openings?|vacanc(?:y|ies)|requisitions?|postings?)/[^?#]+",
+    re.I,
+)
+DEFAULT_SITEMAP_PATHS = ["/sitemap.xml", "/sitemap_index.xml"]
+
+def parse_lastmod(value):
+    """Epoch seconds from a W3C datetime <lastmod> (date-only and naive values are UTC), or None."""
+    try:
+        parsed = datetime.fromisoformat(value.strip().replace("Z", "+00:00"))
+    except (AttributeError, ValueError):
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+class SitemapParser:
+    """Incremental parser for sitemaps and sitemap indexes, fed raw bytes as they arrive.
+
+    Gzipped bodies are inflated on the fly. ``feed()`` returns the entries
+    completed so far as (is_index, loc, lastmod epoch or None); finished
+    elements are dropped, so memory stays flat however large the file is.
+    """
+
+    def __init__(self):
+        self._inflate = None
+        self._started = False
+        self._xml = etree.XMLPullParser(events=("end",), tag=("{*}url", "{*}sitemap"),
+                                        recover=True, resolve_entities=False, no_network=True, huge_tree=True)
+
+    def feed(self, chunk):
+        if not self._started:
+            self._started = True
+            if chunk[:2] == b"\x1f\x8b":
+                self._inflate = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        if self._inflate is not None:
+            chunk = self._inflate.decompress(chunk)
+        self._xml.feed(chunk)
+        return self._drain()
+
+    def close(self):
+        try:
+            self._xml.close()
+        except etree.XMLSyntaxError as e:
+            logger.debug(f"Truncated sitemap: {e}")
+        return self._drain()
+
+    def _drain(self):
+        entries = []
+        for _, el in self._xml.read_events():
+            loc = lastmod = None
+            for child in el:
+                name = etree.QName(child).localname if isinstance(child.tag, str) else None
+                if name == "loc":
+                    loc = (child.text or "").strip()
+                elif name == "lastmod":
+                    lastmod = parse_lastmod(child.text or "")
+            if loc:
+                entries.append((etree.QName(el).localname == "sitemap", loc, lastmod))
+            el.clear()
+            while el.getprevious() is not None:
+                del el.getparent()[0]
+        return entries
+
+async def iter_sitemap(engine, url):
+    """Stream one sitemap document; yields (is_index, loc, lastmod) entries."""
+    parser = SitemapParser()
+    async for chunk in engine.stream(url):
+        for entry in parser.feed(chunk):
+            yield entry
+    for entry in parser.close():
+        yield entry
+
+async def discover_sitemap_links(root_url, engine, since=None, fingerprints=None,
+                                 max_files=SITEMAP_MAX_FILES, max_urls=SITEMAP_MAX_URLS):
+    """Job URLs listed in the sitemaps of root_url's host. Returns (to_fetch, matched).
+
+    Sitemaps come from robots.txt ``Sitemap:`` lines, else the usual locations;
+    indexes are followed. ``matched`` counts every listed URL that looks like a
+    job posting; ``to_fetch`` keeps those whose <lastmod> is after ``since``
+    (epoch) or missing, plus any ``fingerprints`` has never crawled, newest
+    first. Every listed URL counts as seen in ``fingerprints``.
+    """
+    parts = urlparse(root_url)
+    base = f"{parts.scheme}://{parts.netloc}"
+    await asyncio.to_thread(robots.ensure, root_url)
+    pending = robots.sitemaps(root_url) or [base + p for p in DEFAULT_SITEMAP_PATHS]
+    seen_files = set()
+    to_fetch = []
+    matched = 0
+    while pending and len(seen_files) < max_files and matched < max_urls:
+        sitemap_url = pending.pop(0)
+        if sitemap_url in seen_files or not robots.allowed(sitemap_url):
+            continue
+        seen_files.add(sitemap_url)
+        entries = iter_sitemap(engine, sitemap_url)
+        try:
+            async for is_index, loc, lastmod in entries:
+                if is_index:
+                    pending.append(loc)
+                    continue
+                if not SITEMAP_JOB_URL_RE.search(urlparse(loc).path):
+                    continue
+                matched += 1
+                # still listed, so its job is still open even if we do not refetch it now
+                known = fingerprints is not None and fingerprints.page_seen(loc)
+                changed = since is None or lastmod is None or lastmod > since
+                if changed or (fingerprints is not None and not known):
+                    to_fetch.append((lastmod or float("inf"), loc))
+                if matched >= max_urls:
+                    break
+        finally:
+            await entries.aclose()
+    to_fetch.sort(reverse=True)
+    return [loc for _, loc in to_fetch], matched
+
+class RootUnavailable(Exception):
+    """A careers root could not be crawled this time (robots.txt, fetch failure, empty page).
+
+    Nothing about its jobs can be concluded, so the caller must not close them
+    or mark the root completed.
+    """
+
+async def crawl_careers_page_async(root_url, engine, max_job_pages=200, parse_stage=None, frontier=None,
+                                  on_job=None, fingerprints=None, use_sitemaps=SITEMAP_DISCOVERY, sitemap_since=None,
+                                  archive=None):
+    """Crawl a career root through an AsyncFetchEngine; returns (job records, complete).
+
+    Uses the ATS API or sitemaps when the root has them, else link discovery.
+    ``frontier`` (a UrlFrontier) dedupes URLs across roots, ``on_job`` gets each
+    job before its URL is marked done, ``parse_stage`` parses off the loop,
+    ``fingerprints`` skips unchanged pages, ``sitemap_since`` (epoch) limits
+    sitemap entries and ``archive`` keeps fetched pages. ``complete`` is False if
+    postings may have been missed. Raises RootUnavailable when nothing about the
+    root's jobs can be concluded this run.
+    """
+    parse_stage = parse_stage or ParseStage(workers=0)
+    frontier = frontier or UrlFrontier(capacity=100_000)
+    logger.info(f"Crawling {root_url}")
+    if not await asyncio.to_thread(is_allowed_by_robots, root_url):
+        raise RootUnavailable(f"blocked by robots.txt: {root_url}")
+
+    results = []
+    gaps = 0  # pages failed or skipped, or link lists that may have been cut short
+    deferred = 0  # pages of hosts whose Retry-After outlasts this run
+
+    def accept(job):
+        results.append(job)
+        if on_job:
+            on_job(job)
+
+    html = final = None
+    adapter = detect_ats(root_url)
+    if adapter is None:
+        html, final = await engine.fetch(root_url)
+        adapter = detect_ats(final or root_url, html)
+    if adapter is not None:
+        try:
+            with metrics.timer("ats_api"):
+                count = await crawl_ats(adapter, engine, parse_stage, accept, max_job_pages, archive, root_url)
+        except Exception as e:
+            logger.warning(f"{adapter.name} API failed for {root_url}: {e}")
+            count = 0
+            adapter.failures += 1
+        # a failed or capped API listing also leaves the HTML crawl below unable to vouch for every posting
+        gaps += adapter.failures + (count >= max_job_pages)
+        if count:
+            logger.info(f"Fetched {count} jobs for {root_url} from the {adapter.name} API")
+            return results, not gaps
+        logger.info(f"No jobs from the {adapter.name} API for {root_url}; crawling HTML")
+        if html is None:
+            html, final = await engine.fetch(root_url)
+    if not html:
+        raise RootUnavailable(f"could not fetch {root_url}")
+
+    queue = asyncio.PriorityQueue()
+    seq = 0
+
+    def put(url, depth):
+        nonlocal seq
+        seq += 1
+        queue.put_nowait((url_priority(url), depth, seq, url))
+        metrics.add_gauge("crawler_crawl_queue_depth", 1)
+
+    async def enqueue(urls, depth, limit):
+        nonlocal gaps
+        # discovery stops at its cap too, so a full list may have been cut short
+        gaps += len(urls) >= limit
+        allowed = await filter_allowed_by_robots(urls)
+        fresh = [u for u in (frontier.add(u, root_url, depth) for u in allowed[:limit]) if u]
+        for url in fresh:
+            put(url, depth)
+        return len(fresh)
+
+    for _, depth, url in frontier.pending(root_url):
+        put(url, depth)
+    if queue.qsize():
+        logger.info(f"Resuming {queue.qsize()} unfinished links under {root_url}")
+
+    sitemap_links, matched = [], 0
+    if use_sitemaps:
+        with metrics.timer("sitemap"):
+            sitemap_links, matched = await discover_sitemap_links(root_url, engine, since=sitemap_since,
+                                                                  fingerprints=fingerprints)
+    if matched:
+        # the sitemap lists the postings themselves: fetch the changed ones as job pages
+        queued = await enqueue(sitemap_links, 2, max_job_pages)
+        logger.info(f"Sitemaps list {matched} job URLs under {root_url}; {queued} new or changed queued")
+    else:
+        links = await parse_stage.submit(discover_job_links, root_url, html)
+        queued = await enqueue(links, 1, max_job_pages)
+        logger.info(f"Discovered {queued} candidate job-related links from {root_url}")
+
+    async def visit(url, depth):
+        nonlocal gaps, deferred
+        page_html, final_url = await engine.fetch_with_fallback(url)
+        if not page_html:
+            gaps += 1
+            if engine.limiter.held_off(urlparse(url).netloc):
+                # not marked done, so the next run picks it up from the frontier
+                deferred += 1
+                return
+        if archive is not None and page_html:
+            archive.put(url, page_html, final_url, root_url, "job" if depth > 1 else "listing")
+        known = fingerprints.known_hash(url) if fingerprints is not None and page_html else None
+        # job pages are only extracted; listing pages also yield links (one parse serves both:
+        # the page may be a job detail and/or a list page whose job detail links we expand)
+        digest, parsed, inner_job_links = await parse_stage.submit(process_page, final_url, page_html, 50,
+                                                                   known, depth == 1)
+        unchanged = known is not None and fingerprints.page_unchanged(url, digest)
+        if depth > 1:
+            if parsed:
+                accept(parsed)
+            elif not unchanged:
+                metrics.inc("crawler_host_parse_failures_total", host=urlparse(url).netloc)
+        else:
+            if parsed and (parsed.get("title") or parsed.get("raw_description_snippet")):
+                accept(parsed)
+            else:
+                parsed = None
+            # even when unchanged, listing links are needed to reach (and re-see) the job pages
+            await enqueue(inner_job_links, 2, 50)
+        if fingerprints is not None and digest is not None and not unchanged:
+            fingerprints.record_page(url, digest, parsed["url"] if parsed else None)
+        frontier.done(url)
+
+    async def worker():
+        nonlocal gaps
+        while True:
+            _, depth, _, url = await queue.get()
+            metrics.add_gauge("crawler_crawl_queue_depth", -1)
+            try:
+                if len(results) < max_job_pages:
+                    await visit(url, depth)
+                else:
+                    gaps += 1
+            except Exception as e:
+                gaps += 1
+                logger.warning(f"failed to crawl link {url}: {e}")
+            finally:
+                queue.task_done()
+
+    # per-host spacing is enforced by the engine; workers only bound in-flight pages
+    workers = [asyncio.create_task(worker()) for _ in range(ROOT_FETCH_WORKERS)]
+    try:
+        await queue.join()
+    finally:
+        for w in workers:
+            w.cancel()
+    results = results[:max_job_pages]
+
+    logger.info(f"Crawled {len(results)} job pages under {root_url}" + (f" ({gaps} gaps)" if gaps else ""))
+    if deferred:
+        raise RootUnavailable(f"{deferred} pages of {root_url} deferred by Retry-After")
+    return results, not gaps
+
+def crawl_careers_page(root_url, use_playwright=False, max_job_pages=200):
+    """Crawl a career root and return list of job records.
+
+    Blocking wrapper around crawl_careers_page_async. ``use_playwright`` is kept
+    for compatibility: the engine always renders on its shared browser pool.
+    Learned fetch routes are read from and saved back to the crawler state.
+    """
+    state = load_state()
+    routes = state.get_meta("fetch_routes", {})
+
+    async def run():
+        async with AsyncFetchEngine(router=FetchRouter(routes)) as engine:
+            try:
+                return (await crawl_careers_page_async(root_url, engine, max_job_pages=max_job_pages))[0]
+            except RootUnavailable as e:
+                logger.warning(f"Skipped: {e}")
+                return []
+    results = asyncio.run(run())
+    state.set_meta("fetch_routes", routes)
+    state.close()
+    return results
+
+# -----------------------------
+# Streaming job output (NDJSON / CSV / Parquet)
+# -----------------------------
+JOB_FIELDS = [
+    "url", "company_root", "title", "location", "posted", "experience_bucket",
+    "backend", "frontend", "languages", "remote_type", "raw_description_snippet",
+    "content_hash", "first_seen", "source",
+]
+LIST_FIELDS = {"backend", "frontend", "languages"}
+
+class NdjsonSink:
+    """One JSON object per line, flushed per job so readers can tail the file."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._fh = self.path.open("w", encoding="utf-8")
+
+    def write(self, job):
+        self._fh.write(json.dumps(job, ensure_ascii=False) + "\n")
+        self._fh.flush()
+
+    def close(self):
+        self._fh.close()
+
+class CsvSink:
+    """Flat CSV with JOB_FIELDS columns; list fields are joined with ';'."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._fh = self.path.open("w", encoding="utf-8", newline="")
+        self._writer = csv.DictWriter(self._fh, fieldnames=JOB_FIELDS, extrasaction="ignore")
+        self._writer.writeheader()
+
+    def write(self, job):
+        row = {k: ";".join(job.get(k) or []) if k in LIST_FIELDS else job.get(k) for k in JOB_FIELDS}
+        self._writer.writerow(row)
+        self._fh.flush()
+
+    def close(self):
+        self._fh.close()
+
+class ParquetSink:
+    """Columnar output via pyarrow, written in row groups of ``batch_size`` jobs.
+
+    Skill lists are list<dictionary<string>> columns and the low-cardinality
+    string columns are dictionary-encoded, so repeated values cost an index each.
+    Rows go to a ``.tmp`` file that replaces ``path`` on close, so an
+    interrupted run leaves the last complete file in place.
+    """
+
+    def __init__(self, path, batch_size=1000):
+        if pa is None:
+            raise RuntimeError("Parquet output needs pyarrow (pip install pyarrow)")
+        self.path = Path(path)
+        self.batch_size = batch_size
+        cat = pa.dictionary(pa.int32(), pa.string())
+        self.schema = pa.schema([
+            ("url", pa.string()), ("company_root", cat), ("title", pa.string()), ("location", cat),
+            ("posted", pa.string()), ("experience_bucket", cat),
+            ("backend", pa.list_(cat)), ("frontend", pa.list_(cat)), ("languages", pa.list_(cat)),
+            ("remote_type", cat), ("raw_description_snippet", pa.string()),
+            ("content_hash", pa.string()), ("first_seen", pa.string()), ("source", cat),
+        ])
+        self._tmp = self.path.with_name(self.path.name + ".tmp")
+        self._writer = pq.ParquetWriter(str(self._tmp), self.schema)
+        self._rows = []
+
+    def write(self, job):
+        self._rows.append({k: job.get(k) for k in JOB_FIELDS})
+        if len(self._rows) >= self.batch_size:
+            self._flush()
+
+    def _flush(self):
+        if self._rows:
+            self._writer.write_table(pa.Table.from_pylist(self._rows, schema=self.schema))
+            self._rows = []
+
+    def close(self):
+        self._flush()
+        self._writer.close()
+        os.replace(self._tmp, self.path)
+
+JOB_SINKS = {"ndjson": NdjsonSink, "csv": CsvSink, "parquet": ParquetSink}
+
+def open_job_sinks(formats=OUTPUT_FORMATS, stem=JOBS_OUTPUT_STEM):
+    """Open one sink per format, writing to ``stem`` + ``.<format>``."""
+    return [JOB_SINKS[fmt](Path(f"{stem}.{fmt}")) for fmt in formats]
+
+# -----------------------------
+# Analytics generation (mergeable partial aggregates)
+# -----------------------------
+COUNTED_FIELDS = {
+    "by_backend": "backend",
+    "by_frontend": "frontend",
+    "by_language": "languages",
+}
+BUCKETED_FIELDS = {
+    "by_experience_bucket": "experience_bucket",
+    "by_remote_type": "remote_type",
+}
+
+class SpaceSaving:
+    """Bounded heavy-hitters sketch (Space-Saving): at most ``k`` counters.
+
+    Items that fall out of the sketch hand their count to the newcomer, so the
+    counts of frequent items are over-estimates by at most total/k. Merging two
+    sketches sums their counters and keeps the k largest.
+    """
+
+    def __init__(self, k=LOCATION_SKETCH_SIZE, counts=None):
+        self.k = k
+        self.counts = dict(counts or {})
+
+    def add(self, item, n=1):
+        if item in self.counts:
+            self.counts[item] += n
+            if self.counts[item] <= 0:
+                del self.counts[item]
+        elif n > 0:
+            if len(self.counts) >= self.k:
+                victim = min(self.counts, key=self.counts.get)
+                n += self.counts.pop(victim)
+            self.counts[item] = n
+
+    def merge(self, other):
+        combined = Counter(self.counts)
+        combined.update(other.counts)
+        self.counts = dict(combined.most_common(self.k))
+        return self
+
+    def top(self, n):
+        return dict(sorted(self.counts.items(), key=lambda kv: -kv[1])[:n])
+
+class AnalyticsAggregate:
+    """Counts for one slice of jobs; ``merge`` is associative and commutative.
+
+    ``add(job, sign=-1)`` retracts a job, e.g. when a re-crawl replaces it.
+    """
+
+    def __init__(self):
+        self.total = 0
+        self.counters = {name: Counter() for name in list(COUNTED_FIELDS) + list(BUCKETED_FIELDS)}
+        self.locations = SpaceSaving()
+
+    def add(self, job, sign=1):
+        self.total += sign
+        for name, field in COUNTED_FIELDS.items():
+            for value in job.get(field) or []:
+                self.counters[name][value] += sign
+        for name, field in BUCKETED_FIELDS.items():
+            self.counters[name][job.get(field) or "unspecified"] += sign
+        self.locations.add(job.get("location") or "unspecified", sign)
+        return self
+
+    def merge(self, other):
+        self.total += other.total
+        for name, counter in other.counters.items():
+            self.counters[name].update(counter)
+        self.locations.merge(other.locations)
+        return self
+
+    def summary(self, top_locations=20):
+        stats = {"total_jobs": self.total}
+        for name, counter in self.counters.items():
+            stats[name] = {k: v for k, v in counter.items() if v > 0}
+        stats["by_location_top"] = self.locations.top(top_locations)
+        return stats
+
+    def to_dict(self):
+        return {"total": self.total, "counters": self.counters, "locations": self.locations.counts}
+
+    @classmethod
+    def from_dict(cls, data):
+        agg = cls()
+        agg.total = data["total"]
+        for name, counts in data["counters"].items():
+            agg.counters[name] = Counter(counts)
+        agg.locations = SpaceSaving(counts=data["locations"])
+        return agg
+
+class AnalyticsPartials:
+    """AnalyticsAggregate per (company_root, day), combinable across workers and runs.
+
+    ``dirty`` holds the keys changed since the owner last saved them; a partial
+    whose jobs have all been retracted is dropped (its key stays dirty so the
+    saved copy is removed too).
+    """
+
+    def __init__(self, parts=None):
+        self.parts = parts or {}
+        self.dirty = set()
+
+    @staticmethod
+    def key(company, day):
+        return (company or "", day)
+
+    def _part(self, k):
+        self.dirty.add(k)
+        return self.parts.setdefault(k, AnalyticsAggregate())
+
+    def _drop_if_empty(self, k):
+        if self.parts[k].total <= 0:
+            del self.parts[k]
+
+    def add(self, job, day, sign=1):
+        k = self.key(job.get("company_root"), day)
+        self._part(k).add(job, sign)
+        self._drop_if_empty(k)
+
+    def merge(self, other):
+        for k, agg in other.parts.items():
+            self._part(k).merge(agg)
+            self._drop_if_empty(k)
+        return self
+
+    def total(self, company=None):
+        """Merge all partials (or one company's) into a single aggregate."""
+        out = AnalyticsAggregate()
+        for (root, _), agg in self.parts.items():
+            if company is None or root == company:
+                out.merge(agg)
+        return out
+
+    def by_company(self):
+        totals = Counter()
+        for (root, _), agg in self.parts.items():
+            totals[root] += agg.total
+        return {k: v for k, v in totals.items() if v > 0}
+
+def compute_analytics(all_jobs):
+    """Aggregate counts over an iterable of job dicts (consumed once)."""
+    agg = AnalyticsAggregate()
+    for job in all_jobs:
+        agg.add(job)
+    return agg.summary()
+
+# -----------------------------
+# Content fingerprints (change detection + near-duplicate merging)
+# -----------------------------
+_WORD_RE = re.compile(r"\w+")
+_VOLATILE_HTML_RE = re.compile(r"<(script|style|noscript)\b.*?</\1>|<!--.*?-->|\s+", re.S | re.I)
+
+def page_hash(html):
+    """Hash of a fetched body with scripts, comments and whitespace removed (skips re-extraction)."""
+    return hashlib.blake2b(_VOLATILE_HTML_RE.sub("", html or "").encode("utf-8"), digest_size=16).hexdigest()
+
+def _signed64(value):
+    # SQLite integers are signed 64-bit
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+def simhash(tokens, shingle=3):
+    """64-bit SimHash over word shingles; similar texts differ in few bits."""
+    grams = [" ".join(tokens[i:i + shingle]) for i in range(max(1, len(tokens) - shingle + 1))]
+    digests = [hashlib.blake2b(g.encode("utf-8"), digest_size=8).digest() for g in grams]
+    # a bit is set when more than half the shingle hashes have it; the per-bit
+    # counts are taken column-wise instead of looping over 64 bits per shingle
+    half = len(digests) / 2
+    if np is not None:
+        bits = np.unpackbits(np.frombuffer(b"".join(digests), dtype=np.uint8), bitorder="little")
+        counts = bits.reshape(-1, 64).sum(axis=0)
+        return int.from_bytes(np.packbits(counts > half, bitorder="little").tobytes(), "little")
+    rows = [format(int.from_bytes(d, "little"), "064b") for d in digests]
+    return int("".join("1" if column.count("1") > half else "0" for column in zip(*rows)), 2)
+
+def content_fingerprint(text):
+    """Return (exact hash of normalized text, signed 64-bit SimHash)."""
+    tokens = _WORD_RE.findall((text or "").lower())
+    exact = hashlib.blake2b(" ".join(tokens).encode("utf-8"), digest_size=16).hexdigest()
+    return exact, _signed64(simhash(tokens))
+
+def _simhash_bands(value):
+    # 4 x 16-bit bands: two hashes within 3 bits of each other share at least one band
+    value &= (1 << 64) - 1
+    return [(band, value >> (16 * band) & 0xFFFF) for band in range(4)]
+
+class FingerprintIndex:
+    """Page hashes and job fingerprints (exact and SimHash) inside the crawl state store."""
+
+    def __init__(self, store):
+        self.store = store
+        self._db = store._db
+        self._db.executescript(
+            "CREATE TABLE IF NOT EXISTS page_hashes (url TEXT PRIMARY KEY, hash TEXT, job_url TEXT);"
+            "CREATE TABLE IF NOT EXISTS fingerprints ("
+            " url TEXT PRIMARY KEY, job_url TEXT, root TEXT, title TEXT, exact TEXT, simhash INTEGER,"
+            " first_seen REAL, last_seen REAL, closed_at REAL);"
+            "CREATE INDEX IF NOT EXISTS fingerprints_exact ON fingerprints(exact);"
+            "CREATE INDEX IF NOT EXISTS fingerprints_root ON fingerprints(root, last_seen);"
+            "CREATE TABLE IF NOT EXISTS simhash_bands (band INTEGER, value INTEGER, url TEXT,"
+            " PRIMARY KEY (band, value, url));"
+        )
+
+    def page_unchanged(self, url, digest):
+        """True if url's last recorded hash is digest; the job it produced (and its primary) count as seen."""
+        row = self._db.execute("SELECT hash, job_url FROM page_hashes WHERE url = ?", (canonicalize_url(url),)).fetchone()
+        if not row or row[0] != digest:
+            return False
+        self._mark_seen(row[1])
+        return True
+
+    def known_hash(self, url):
+        """Hash recorded for url at its last crawl, or None."""
+        row = self._db.execute("SELECT hash FROM page_hashes WHERE url = ?", (canonicalize_url(url),)).fetchone()
+        return row[0] if row else None
+
+    def page_seen(self, url):
+        """Count the job from an already crawled url as seen without refetching; False if url was never crawled."""
+        row = self._db.execute("SELECT job_url FROM page_hashes WHERE url = ?", (canonicalize_url(url),)).fetchone()
+        if not row:
+            return False
+        self._mark_seen(row[0])
+        return True
+
+    def _mark_seen(self, job_url):
+        if job_url:
+            self._db.execute(
+                "UPDATE fingerprints SET last_seen = ?, closed_at = NULL"
+                " WHERE url = ? OR url = (SELECT job_url FROM fingerprints WHERE url = ?)",
+                (time.time(), job_url, job_url),
+            )
+            self.store._touch()
+
+    def record_page(self, url, digest, job_url=None):
+        self._db.execute(
+            "INSERT OR REPLACE INTO page_hashes VALUES (?, ?, ?)",
+            (canonicalize_url(url), digest, canonicalize_url(job_url) if job_url else None),
+        )
+        self.store._touch()
+
+    def _near_duplicate(self, url, title, exact, sim):
+        candidates = {r[0] for r in self._db.execute(
+            "SELECT url FROM fingerprints WHERE exact = ? AND url = job_url AND url != ?", (exact, url))}
+        for band, value in _simhash_bands(sim):
+            candidates.update(r[0] for r in self._db.execute(
+                "SELECT url FROM simhash_bands WHERE band = ? AND value = ? AND url != ?", (band, value, url)))
+        for cand in candidates:
+            row = self._db.execute("SELECT title, simhash FROM fingerprints WHERE url = ?", (cand,)).fetchone()
+            if row and (row[0] or "") == title and bin((row[1] ^ sim) & ((1 << 64) - 1)).count("1") <= SIMHASH_MAX_DISTANCE:
+                return cand
+        return None
+
+    def observe(self, job):
+        """Record job's fingerprint; returns (canonical job url, first_seen epoch)."""
+        url = canonicalize_url(job["url"])
+        title = (job.get("title") or "").strip().lower()
+        exact, sim = job.get("content_hash"), job.get("simhash")
+        now = time.time()
+        row = self._db.execute("SELECT job_url, first_seen FROM fingerprints WHERE url = ?", (url,)).fetchone()
+        if row:
+            job_url, first_seen = row
+        else:
+            job_url, first_seen = self._near_duplicate(url, title, exact, sim) or url, now
+        self._db.execute(
+            "INSERT OR REPLACE INTO fingerprints VALUES (?, ?, ?, ?, ?, ?, ?, ?, NULL)",
+            (url, job_url, job.get("company_root"), title, exact, sim, first_seen, now),
+        )
+        if job_url == url:
+            self._db.execute("DELETE FROM simhash_bands WHERE url = ?", (url,))
+            self._db.executemany(
+                "INSERT OR IGNORE INTO simhash_bands VALUES (?, ?, ?)",
+                [(band, value, url) for band, value in _simhash_bands(sim)],
+            )
+        else:
+            self._db.execute("UPDATE fingerprints SET last_seen = ?, closed_at = NULL WHERE url = ?", (now, job_url))
+        self.store._touch()
+        return job_url, first_seen
+
+    def fold(self, job):
+        """Point a job merged in from another store at an earlier near-duplicate primary; returns it or None."""
+        url = canonicalize_url(job["url"])
+        primary = self._near_duplicate(url, (job.get("title") or "").strip().lower(),
+                                       job.get("content_hash"), job.get("simhash"))
+        if primary is None:
+            return None
+        self._db.execute("UPDATE fingerprints SET job_url = ? WHERE url = ? OR job_url = ?", (primary, url, url))
+        self._db.execute("DELETE FROM simhash_bands WHERE url = ?", (url,))
+        self.store._touch()
+        return primary
+
+    def close_missing(self, root, crawl_started):
+        """Mark root's jobs not seen since crawl_started as closed; returns how many."""
+        cur = self._db.execute(
+            "UPDATE fingerprints SET closed_at = ? WHERE root = ? AND last_seen < ? AND closed_at IS NULL",
+            (time.time(), root, crawl_started),
+        )
+        self.store._touch()
+        return cur.rowcount
+
+# -----------------------------
+# Crawl state store (SQLite, WAL, batched commits)
+# -----------------------------
+def _url_key(canonical):
+    # 63-bit hash as the rowid keeps the visited table compact and lookups O(1)-ish
+    return int.from_bytes(hashlib.blake2b(canonical.encode("utf-8"), digest_size=8).digest(), "little") >> 1
+
+class CrawlStateStore:
+    """Crawler state in SQLite: completed roots, per-URL progress, jobs and metadata.
+
+    Writes are batched: every ``batch_size`` changes (or STATE_COMMIT_SECONDS)
+    one transaction commits the jobs together with the URLs that produced them,
+    so after a crash a resumed run continues from the last committed URL rather
+    than the start of the root. Opening is cheap; nothing is loaded up front.
+    A legacy crawler_state.json is imported on first open.
+    """
+
+    def __init__(self, path=STATE_DB_FILE, batch_size=STATE_BATCH_SIZE, legacy_path=STATE_FILE):
+        self.path = path
+        self.batch_size = batch_size
+        fresh = not Path(path).exists()
+        self._db = sqlite3.connect(str(path), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(
+            "CREATE TABLE IF NOT EXISTS roots (root TEXT PRIMARY KEY, completed_at REAL);"
+            "CREATE TABLE IF NOT EXISTS urls ("
+            " key INTEGER PRIMARY KEY, url TEXT, root TEXT, depth INTEGER, priority INTEGER, done INTEGER DEFAULT 0);"
+            "CREATE INDEX IF NOT EXISTS urls_pending ON urls(root) WHERE done = 0;"
+            "CREATE TABLE IF NOT EXISTS jobs (url TEXT PRIMARY KEY, root TEXT, data TEXT, crawled_at REAL);"
+            "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);"
+            "CREATE TABLE IF NOT EXISTS analytics_partials (company TEXT, day TEXT, data TEXT, PRIMARY KEY (company, day));"
+        )
+        self._dirty = 0
+        self._last_commit = time.monotonic()
+        self._meta_cache = {}
+        self._partials = None
+        self.fingerprints = FingerprintIndex(self)
+        if fresh and legacy_path and Path(legacy_path).exists():
+            self._import_legacy(Path(legacy_path))
+
+    def _import_legacy(self, path):
+        legacy = json.loads(path.read_text())
+        for root in legacy.get("completed", []):
+            self.mark_root_completed(root)
+        for job in legacy.get("jobs", []):
+            self.add_job(job)
+        if "fetch_routes" in legacy:
+            self.set_meta("fetch_routes", legacy["fetch_routes"])
+        self.commit()
+        logger.info(f"Imported legacy state from {path}")
+
+    def _touch(self):
+        self._dirty += 1
+        if self._dirty >= self.batch_size or time.monotonic() - self._last_commit > STATE_COMMIT_SECONDS:
+            self.commit()
+
+    def commit(self):
+        started = time.perf_counter()
+        if self._partials is not None:
+            self._save_partials()
+        for key, value in self._meta_cache.items():
+            self._db.execute("INSERT OR REPLACE INTO meta VALUES (?, ?)", (key, json.dumps(value)))
+        self._db.commit()
+        metrics.observe("state_commit", time.perf_counter() - started)
+        self._dirty = 0
+        self._last_commit = time.monotonic()
+
+    def new_crawl(self):
+        """Start a fresh crawl generation: forget completed roots and visited URLs.
+
+        Jobs, fingerprints and page hashes stay, so unchanged pages are skipped
+        and jobs not seen again can be closed.
+        """
+        self._db.execute("DELETE FROM roots")
+        self._db.execute("DELETE FROM urls")
+        self.set_meta("root_started", {})
+        self.set_meta("generation_started", time.time())
+        self.commit()
+
+    # roots
+    def is_root_completed(self, root):
+        return self._db.execute("SELECT 1 FROM roots WHERE root = ?", (root,)).fetchone() is not None
+
+    def mark_root_completed(self, root):
+        self._db.execute("INSERT OR REPLACE INTO roots VALUES (?, ?)", (root, time.time()))
+        self._touch()
+
+    # urls
+    def add_url(self, canonical, root=None, depth=1, priority=1):
+        """Record a scheduled URL; returns False if it was already known."""
+        cur = self._db.execute(
+            "INSERT OR IGNORE INTO urls (key, url, root, depth, priority) VALUES (?, ?, ?, ?, ?)",
+            (_url_key(canonical), canonical, root, depth, priority),
+        )
+        if cur.rowcount:
+            self._touch()
+        return cur.rowcount > 0
+
+    def is_url_done(self, canonical):
+        row = self._db.execute("SELECT done FROM urls WHERE key = ?", (_url_key(canonical),)).fetchone()
+        return bool(row and row[0])
+
+    def mark_url_done(self, canonical):
+        self._db.execute("UPDATE urls SET done = 1 WHERE key = ?", (_url_key(canonical),))
+        self._touch()
+
+    def pending_urls(self, root):
+        """(priority, depth, url) scheduled under root but not finished -- the resume point."""
+        return self._db.execute(
+            "SELECT priority, depth, url FROM urls WHERE root = ? AND done = 0", (root,)
+        ).fetchall()
+
+    # jobs
+    def add_job(self, job, crawled_at=None):
+        """Store job (replacing an earlier crawl of its URL) and update the analytics partials.
+
+        Returns when the URL was last crawled before this, or None if it is new.
+        """
+        key = canonicalize_url(job["url"])
+        now = time.time() if crawled_at is None else crawled_at
+        partials = self.analytics()
+        old = self._db.execute("SELECT data, crawled_at FROM jobs WHERE url = ?", (key,)).fetchone()
+        if old:
+            partials.add(json.loads(old[0]), _day(old[1]), sign=-1)
+        partials.add(job, _day(now))
+        self._db.execute(
+            "INSERT OR REPLACE INTO jobs VALUES (?, ?, ?, ?)",
+            (key, job.get("company_root"), json.dumps(job), now),
+        )
+        self._touch()
+        return old[1] if old else None
+
+    def merge_duplicate(self, job_url, duplicate_url):
+        """Record duplicate_url as another address of the stored job at job_url."""
+        row = self._db.execute("SELECT data, crawled_at FROM jobs WHERE url = ?", (job_url,)).fetchone()
+        if not row:
+            return
+        job = json.loads(row[0])
+        dups = job.setdefault("duplicate_urls", [])
+        if duplicate_url not in dups:
+            dups.append(duplicate_url)
+            # a new address is not a new crawl of the job's own page
+            self.add_job(job, crawled_at=row[1])
+
+    def unchanged_jobs(self, roots, since):
+        """Open jobs of roots seen again since ``since`` without being re-extracted (their pages were unchanged)."""
+        marks = ",".join("?" * len(roots))
+        rows = self._db.execute(
+            f"SELECT j.data FROM jobs j JOIN fingerprints f ON f.url = j.url WHERE j.root IN ({marks})"
+            " AND f.last_seen >= ? AND f.closed_at IS NULL AND j.crawled_at < ?",
+            list(roots) + [since, since],
+        )
+        for (data,) in rows:
+            yield json.loads(data)
+
+    def generation_jobs(self, since):
+        """Jobs this crawl generation (started at ``since``) has committed: crawled in it, or seen unchanged under a completed root."""
+        rows = self._db.execute(
+            "SELECT data FROM jobs WHERE crawled_at >= ?"
+            " UNION ALL SELECT j.data FROM jobs j JOIN fingerprints f ON f.url = j.url JOIN roots r ON r.root = j.root"
+            " WHERE j.crawled_at < ? AND f.last_seen >= ? AND f.closed_at IS NULL",
+            (since, since, since),
+        )
+        for (data,) in rows:
+            yield json.loads(data)
+
+    def fold_duplicate(self, job):
+        """Fold a merged-in job into an earlier near-duplicate from another shard; True if it was folded."""
+        primary = self.fingerprints.fold(job)
+        if primary is None:
+            return False
+        key = canonicalize_url(job["url"])
+        old = self._db.execute("SELECT data, crawled_at FROM jobs WHERE url = ?", (key,)).fetchone()
+        if old:
+            self.analytics().add(json.loads(old[0]), _day(old[1]), sign=-1)
+            self._db.execute("DELETE FROM jobs WHERE url = ?", (key,))
+        for url in [job["url"]] + job.get("duplicate_urls", []):
+            self.merge_duplicate(primary, url)
+        self._touch()
+        return True
+
+    def iter_jobs(self, since=None):
+        """Stream stored jobs, optionally only those crawled at or after ``since`` (epoch)."""
+        query, args = "SELECT data FROM jobs", ()
+        if since is not None:
+            query, args = query + " WHERE crawled_at >= ?", (since,)
+        for (data,) in self._db.execute(query, args):
+            yield json.loads(data)
+
+    def job_count(self):
+        return self._db.execute("SELECT COUNT(*) FROM jobs").fetchone()[0]
+
+    # analytics
+    def analytics(self):
+        """AnalyticsPartials over every stored job, kept current by add_job()."""
+        if self._partials is None:
+            rows = self._db.execute("SELECT company, day, data FROM analytics_partials").fetchall()
+            if rows:
+                self._partials = AnalyticsPartials(
+                    {(company, day): AnalyticsAggregate.from_dict(json.loads(data)) for company, day, data in rows})
+            else:
+                self._partials = self.rebuild_analytics()
+        return self._partials
+
+    def _save_partials(self):
+        """Write only the partials changed since the last commit."""
+        partials = self._partials
+        for k in partials.dirty:
+            agg = partials.parts.get(k)
+            if agg is None:
+                self._db.execute("DELETE FROM analytics_partials WHERE company = ? AND day = ?", k)
+            else:
+                self._db.execute("INSERT OR REPLACE INTO analytics_partials VALUES (?, ?, ?)",
+                                 k + (json.dumps(agg.to_dict()),))
+        partials.dirty.clear()
+
+    def rebuild_analytics(self):
+        """Recompute the partials from the stored jobs with grouped SQL, no crawling."""
+        partials = AnalyticsPartials()
+        day = "date(jobs.crawled_at, 'unixepoch')"
+
+        def part(root, d):
+            return partials.parts.setdefault(AnalyticsPartials.key(root, d), AnalyticsAggregate())
+
+        for root, d, n in self._db.execute(f"SELECT root, {day}, COUNT(*) FROM jobs GROUP BY 1, 2"):
+            part(root, d).total += n
+        for name, field in COUNTED_FIELDS.items():
+            rows = self._db.execute(
+                f"SELECT jobs.root, {day}, j.value, COUNT(*) FROM jobs, json_each(jobs.data, '$.{field}') AS j"
+                " GROUP BY 1, 2, 3"
+            )
+            for root, d, value, n in rows:
+                part(root, d).counters[name][value] += n
+        scalar = dict(BUCKETED_FIELDS, location="location")
+        for name, field in scalar.items():
+            rows = self._db.execute(
+                f"SELECT root, {day}, COALESCE(NULLIF(json_extract(data, '$.{field}'), ''), 'unspecified'), COUNT(*)"
+                " FROM jobs GROUP BY 1, 2, 3 ORDER BY 4 DESC"
+            )
+            for root, d, value, n in rows:
+                if name == "location":
+                    part(root, d).locations.add(value, n)
+                else:
+                    part(root, d).counters[name][value] += n
+        self._db.execute("DELETE FROM analytics_partials")
+        partials.dirty = set(partials.parts)
+        self._partials = partials
+        return partials
+
+    # metadata (small JSON values, written on commit)
+    def get_meta(self, key, default=None):
+        if key not in self._meta_cache:
+            row = self._db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+            self._meta_cache[key] = json.loads(row[0]) if row else default
+        return self._meta_cache[key]
+
+    def set_meta(self, key, value):
+        self._meta_cache[key] = value
+        self._touch()
+
+    # merging stores (distributed crawls)
+    def import_roots(self, path, roots, since=None, completed=True):
+        """Copy the jobs, fingerprints and page hashes of ``roots`` from the store at path; returns the jobs.
+
+        Seeds a worker's store from the main one (``completed=False``, so the
+        worker still crawls the roots) and merges a worker's results back. With
+        ``since`` only jobs crawled at or after it are copied. Fingerprints keep
+        the earliest first_seen and latest last_seen of both stores.
+        """
+        if not roots or not Path(path).exists():
+            return []
+        self.commit()
+        self._db.execute("ATTACH DATABASE ? AS other", (str(path),))
+        try:
+            marks = ",".join("?" * len(roots))
+            query, args = f"SELECT data, crawled_at FROM other.jobs WHERE root IN ({marks})", list(roots)
+            if since is not None:
+                query, args = query + " AND crawled_at >= ?", args + [since]
+            jobs = []
+            for data, crawled_at in self._db.execute(query, args).fetchall():
+                job = json.loads(data)
+                self.add_job(job, crawled_at=crawled_at)
+                jobs.append(job)
+            self._db.execute(
+                f"INSERT INTO fingerprints SELECT * FROM other.fingerprints WHERE root IN ({marks})"
+                " ON CONFLICT(url) DO UPDATE SET job_url = excluded.job_url, title = excluded.title,"
+                " exact = excluded.exact, simhash = excluded.simhash,"
+                " first_seen = MIN(first_seen, excluded.first_seen), last_seen = MAX(last_seen, excluded.last_seen),"
+                " closed_at = CASE WHEN excluded.last_seen >= last_seen THEN excluded.closed_at ELSE closed_at END",
+                roots,
+            )
+            # the other store may point at a primary this one has since folded into an earlier job
+            self._db.execute(
+                "UPDATE fingerprints SET job_url = (SELECT p.job_url FROM fingerprints p WHERE p.url = fingerprints.job_url)"
+                f" WHERE root IN ({marks}) AND job_url IN (SELECT url FROM fingerprints WHERE url != job_url)",
+                roots,
+            )
+            self._db.execute(
+                "INSERT OR IGNORE INTO simhash_bands SELECT b.* FROM other.simhash_bands b"
+                f" JOIN other.fingerprints f ON f.url = b.url WHERE f.root IN ({marks})", roots)
+            self._db.execute(
+                "INSERT OR REPLACE INTO page_hashes SELECT p.* FROM other.page_hashes p"
+                f" JOIN other.fingerprints f ON f.url = p.job_url WHERE f.root IN ({marks})", roots)
+            if completed:
+                self._db.execute(f"INSERT OR REPLACE INTO roots SELECT * FROM other.roots WHERE root IN ({marks})", roots)
+            other_meta = {key: json.loads(value) for key, value in self._db.execute(
+                "SELECT key, value FROM other.meta WHERE key IN ('fetch_routes', 'sitemap_checked')")}
+            self.set_meta("fetch_routes", {**self.get_meta("fetch_routes", {}), **other_meta.get("fetch_routes", {})})
+            checked = other_meta.get("sitemap_checked", {})
+            self.set_meta("sitemap_checked", {**self.get_meta("sitemap_checked", {}),
+                                              **{r: checked[r] for r in roots if r in checked}})
+        finally:
+            self.commit()
+            self._db.execute("DETACH DATABASE other")
+        return jobs
+
+    def close(self):
+        self.commit()
+        self._db.close()
+
+def _day(ts):
+    return time.strftime("%Y-%m-%d", time.gmtime(ts))
+
+def load_state():
+    """Open the crawl state store (cheap: no data is read until queried)."""
+    return CrawlStateStore()
+
+def save_state(state):
+    state.commit()
+
+# -----------------------------
+# Page archive (content-addressed raw HTML for offline re-extraction)
+# -----------------------------
+ARCHIVE_CODEC = "zstd" if zstandard is not None else "zlib"
+
+def _archive_compress(data):
+    if ARCHIVE_CODEC == "zstd":
+        return zstandard.ZstdCompressor(level=3).compress(data)
+    return zlib.compress(data, 6)
+
+def _archive_decompress(data, codec):
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("archive record is zstd-compressed; pip install zstandard to read it")
+        return zstandard.ZstdDecompressor().decompress(data)
+    return zlib.decompress(data)
+
+class PageArchive:
+    """Every fetched page body, stored once per distinct content, for re-extraction without the network.
+
+    Bodies are keyed by their BLAKE2b hash and appended as independently
+    compressed records (zstd when installed, else zlib) to segment files of
+    ARCHIVE_SEGMENT_BYTES; ``index.sqlite`` maps each hash to its (segment,
+    offset, length) and each archived URL to its latest body, root and kind
+    ("listing", "job", or "ats" for the JSON of an ATS posting). Several
+    processes may share one archive: each appends to its own segments.
+    """
+
+    def __init__(self, path=ARCHIVE_DIR, segment_bytes=ARCHIVE_SEGMENT_BYTES):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.segment_bytes = segment_bytes
+        self._db = sqlite3.connect(str(self.path / "index.sqlite"), timeout=60, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(
+            "CREATE TABLE IF NOT EXISTS blobs (hash TEXT PRIMARY KEY, segment TEXT, offset INTEGER, length INTEGER,"
+            " codec TEXT, size INTEGER);"
+            "CREATE TABLE IF NOT EXISTS pages (url TEXT PRIMARY KEY, final_url TEXT, root TEXT, kind TEXT,"
+            " hash TEXT, fetched_at REAL);"
+        )
+        self._writer = f"{socket.gethostname()}-{os.getpid()}"
+        self._fh = None
+        self._lock = threading.Lock()
+
+    def _segment(self):
+        if self._fh is None or self._fh.tell() >= self.segment_bytes:
+            if self._fh is not None:
+                self._fh.close()
+            n = len(list(self.path.glob(f"{self._writer}-*.seg")))
+            self._fh = (self.path / f"{self._writer}-{n:05d}.seg").open("ab")
+        return self._fh
+
+    def put(self, url, text, final_url=None, root=None, kind="job"):
+        """Archive text as fetched from url; a body already in the archive is only indexed again."""
+        data = text.encode("utf-8")
+        digest = hashlib.blake2b(data, digest_size=16).hexdigest()
+        with self._lock:
+            if self._db.execute("SELECT 1 FROM blobs WHERE hash = ?", (digest,)).fetchone() is None:
+                record = _archive_compress(data)
+                fh = self._segment()
+                offset = fh.tell()
+                fh.write(record)
+                self._db.execute("INSERT OR IGNORE INTO blobs VALUES (?, ?, ?, ?, ?, ?)",
+                                 (digest, Path(fh.name).name, offset, len(record), ARCHIVE_CODEC, len(data)))
+                metrics.inc("crawler_archive_bytes_total", len(record))
+            self._db.execute(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?)",
+                (canonicalize_url(url), canonicalize_url(final_url or url), root, kind, digest, time.time()),
+            )
+            # short transactions: other processes may be writing to the same index
+            self._commit()
+
+    def get(self, url):
+        """Latest archived body of url, or None."""
+        row = self._db.execute(
+            "SELECT b.segment, b.offset, b.length, b.codec FROM pages p JOIN blobs b ON b.hash = p.hash"
+            " WHERE p.url = ?", (canonicalize_url(url),)).fetchone()
+        if row is None:
+            return None
+        return _read_archived(self.path, *row)
+
+    def records(self, skip_duplicates_in=None):
+        """Index rows (url, final_url, root, kind, fetched_at, segment, offset, length, codec) in segment order.
+
+        With the path of a crawl state store, pages folded there as near-duplicates
+        of another job are left out, as the crawl left them out.
+        """
+        query = ("SELECT p.url, p.final_url, p.root, p.kind, p.fetched_at, b.segment, b.offset, b.length, b.codec"
+                 " FROM pages p JOIN blobs b ON b.hash = p.hash")
+        if skip_duplicates_in is not None and Path(skip_duplicates_in).exists():
+            self._db.execute("ATTACH DATABASE ? AS state", (str(skip_duplicates_in),))
+            query += " WHERE p.final_url NOT IN (SELECT url FROM state.fingerprints WHERE url != job_url)"
+        yield from self._db.execute(query + " ORDER BY b.segment, b.offset")
+
+    def stats(self):
+        pages, = self._db.execute("SELECT COUNT(*) FROM pages").fetchone()
+        blobs, stored, raw = self._db.execute(
+            "SELECT COUNT(*), COALESCE(SUM(length), 0), COALESCE(SUM(size), 0) FROM blobs").fetchone()
+        return {"pages": pages, "bodies": blobs, "stored_bytes": stored, "raw_bytes": raw}
+
+    def _commit(self):
+        # segment bytes reach disk before the index rows that point at them
+        if self._fh is not None:
+            self._fh.flush()
+        self._db.commit()
+
+    def close(self):
+        with self._lock:
+            self._commit()
+            if self._fh is not None:
+                self._fh.close()
+                self._fh = None
+            self._db.close()
+
+def _read_archived(path, segment, offset, length, codec):
+    with open(Path(path) / segment, "rb") as fh:
+        fh.seek(offset)
+        return _archive_decompress(fh.read(length), codec).decode("utf-8")
+
+def _reextract_chunk(path, rows):
+    """Re-parse a chunk of archive rows (in a pool process); returns ([(job, fetched_at)], AnalyticsAggregate)."""
+    agg = AnalyticsAggregate()
+    found = []
+    handles = {}
+    try:
+        for url, final_url, root, kind, fetched_at, segment, offset, length, codec in rows:
+            fh = handles.get(segment)
+            if fh is None:
+                fh = handles[segment] = open(Path(path) / segment, "rb")
+            fh.seek(offset)
+            text = _archive_decompress(fh.read(length), codec).decode("utf-8")
+            if kind == "ats":
+                job = job_from_listing(json.loads(text))
+            else:
+                job = parse_job_page(final_url, text)
+                if job and kind == "listing" and not (job.get("title") or job.get("raw_description_snippet")):
+                    # same acceptance rule as the crawl applies to listing pages
+                    job = None
+            if job is None:
+                continue
+            job["company_root"] = root
+            agg.add(job)
+            found.append((job, fetched_at))
+    finally:
+        for fh in handles.values():
+            fh.close()
+    return found, agg
+
+def _chunks(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def reextract(archive_dir=ARCHIVE_DIR, workers=PARSE_WORKERS, output_formats=OUTPUT_FORMATS, stem=JOBS_OUTPUT_STEM,
+              state_path=STATE_DB_FILE, update_state=True):
+    """Re-run job extraction and analytics over an archive, with no network; returns like main().
+
+    Chunks of REEXTRACT_CHUNK archived pages are parsed in ``workers``
+    processes, each also aggregating its own analytics; the parent merges the
+    aggregates and writes the jobs to fresh sinks. With a state store at
+    ``state_path``, pages it folded as duplicates are skipped and (with
+    ``update_state``) the stored jobs are replaced by the re-extracted ones,
+    keeping first_seen and duplicate_urls. Analytics cover the archived pages.
+    """
+    archive = PageArchive(archive_dir)
+    state = CrawlStateStore(path=state_path, legacy_path=None) if Path(state_path).exists() else None
+    sinks = open_job_sinks(output_formats, stem)
+    agg, by_company, job_count = AnalyticsAggregate(), Counter(), 0
+    started = time.perf_counter()
+
+    def absorb(result):
+        nonlocal job_count
+        found, part = result
+        agg.merge(part)
+        for job, fetched_at in found:
+            if state is not None and update_state:
+                old = state._db.execute("SELECT data FROM jobs WHERE url = ?", (canonicalize_url(job["url"]),)).fetchone()
+                if old:
+                    old = json.loads(old[0])
+                    for field in ("first_seen", "duplicate_urls"):
+                        if field in old:
+                            job[field] = old[field]
+                state.add_job(job, crawled_at=fetched_at)
+            for sink in sinks:
+                sink.write(job)
+            by_company[job["company_root"]] += 1
+            job_count += 1
+
+    try:
+        chunks = _chunks(archive.records(skip_duplicates_in=state_path if state else None), REEXTRACT_CHUNK)
+        if workers > 0:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                in_flight = deque()
+                for chunk in chunks:
+                    in_flight.append(pool.submit(_reextract_chunk, archive.path, chunk))
+                    if len(in_flight) >= 2 * workers:
+                        absorb(in_flight.popleft().result())
+                while in_flight:
+                    absorb(in_flight.popleft().result())
+        else:
+            for chunk in chunks:
+                absorb(_reextract_chunk(archive.path, chunk))
+    finally:
+        for sink in sinks:
+            sink.close()
+        archive.close()
+        if state is not None:
+            state.close()
+    analytics = agg.summary()
+    analytics["by_company"] = dict(by_company)
+    OUTPUT_FILE.write_text(json.dumps({"analytics": analytics}, indent=2))
+    logger.info(f"Re-extracted {job_count} jobs from {archive_dir} in {time.perf_counter() - started:.1f}s")
+    return {"jobs_written": job_count, "outputs": [str(s.path) for s in sinks], "analytics": analytics}
+
+# -----------------------------
+# Distributed crawl (shared shard queue, leases)
+# -----------------------------
+def shard_key(url):
+    """Registered domain of url: every root (and so every host) of one company lands on one worker."""
+    ext = tldextract.extract(url)
+    return ext.registered_domain or urlparse(url).netloc
+
+class WorkQueue:
+    """Careers roots sharded by registered domain in a SQLite file shared by every worker.
+
+    Shards are leased for ``lease_seconds``; an expired lease makes them leasable again.
+    """
+
+    def __init__(self, path=WORK_QUEUE_FILE, lease_seconds=LEASE_SECONDS):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self._db = sqlite3.connect(str(path), timeout=60, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS shards (domain TEXT PRIMARY KEY, roots TEXT, state TEXT DEFAULT 'pending',"
+            " worker TEXT, lease_until REAL, leased_at REAL, attempts INTEGER DEFAULT 0)"
+        )
+
+    def fill(self, roots):
+        """Queue roots grouped by shard_key (known shards are kept); returns the number of new shards."""
+        shards = {}
+        for root in roots:
+            shards.setdefault(shard_key(root), []).append(root)
+        cur = self._db.executemany(
+            "INSERT OR IGNORE INTO shards (domain, roots) VALUES (?, ?)",
+            [(domain, json.dumps(rs)) for domain, rs in shards.items()],
+        )
+        return cur.rowcount
+
+    def reset(self):
+        self._db.execute("DELETE FROM shards")
+
+    def lease(self, worker, limit=LEASE_BATCH):
+        """Lease up to limit pending or expired shards to worker; returns [(domain, roots, leased_at)]."""
+        now = time.time()
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            rows = self._db.execute(
+                "SELECT domain, roots FROM shards WHERE attempts < ?"
+                " AND (state = 'pending' OR (state = 'leased' AND lease_until < ?))"
+                " ORDER BY attempts, domain LIMIT ?",
+                (MAX_LEASE_ATTEMPTS, now, limit),
+            ).fetchall()
+            self._db.executemany(
+                "UPDATE shards SET state = 'leased', worker = ?, lease_until = ?, leased_at = ?,"
+                " attempts = attempts + 1 WHERE domain = ?",
+                [(worker, now + self.lease_seconds, now, domain) for domain, _ in rows],
+            )
+            self._db.execute("COMMIT")
+        except BaseException:
+            self._db.execute("ROLLBACK")
+            raise
+        return [(domain, json.loads(roots), now) for domain, roots in rows]
+
+    def renew(self, worker, domains):
+        """Extend worker's leases on domains; returns the ones it still holds."""
+        held = []
+        for domain in domains:
+            cur = self._db.execute(
+                "UPDATE shards SET lease_until = ? WHERE domain = ? AND worker = ? AND state = 'leased'",
+                (time.time() + self.lease_seconds, domain, worker),
+            )
+            if cur.rowcount:
+                held.append(domain)
+        return held
+
+    def complete(self, worker, domain):
+        self._db.execute("UPDATE shards SET state = 'done' WHERE domain = ? AND worker = ? AND state = 'leased'",
+                         (domain, worker))
+
+    def release(self, worker, domain):
+        """Give an unfinished shard back to the queue without waiting for its lease to run out."""
+        self._db.execute("UPDATE shards SET state = 'pending' WHERE domain = ? AND worker = ? AND state = 'leased'",
+                         (domain, worker))
+
+    def done(self):
+        """Completed, not yet merged shards: [(domain, roots, worker, leased_at)]."""
+        return [(domain, json.loads(roots), worker, leased_at) for domain, roots, worker, leased_at in self._db.execute(
+            "SELECT domain, roots, worker, leased_at FROM shards WHERE state = 'done'")]
+
+    def mark_merged(self, domain):
+        self._db.execute("UPDATE shards SET state = 'merged' WHERE domain = ?", (domain,))
+
+    def remaining(self):
+        """Shards some worker may still crawl: pending, leased, or expired with attempts left."""
+        return self._db.execute(
+            "SELECT COUNT(*) FROM shards WHERE (state = 'pending' AND attempts < ?)"
+            " OR (state = 'leased' AND (lease_until >= ? OR attempts < ?))",
+            (MAX_LEASE_ATTEMPTS, time.time(), MAX_LEASE_ATTEMPTS),
+        ).fetchone()[0]
+
+    def counts(self):
+        return dict(self._db.execute("SELECT state, COUNT(*) FROM shards GROUP BY state").fetchall())
+
+    def close(self):
+        self._db.close()
+
+class SharedHostSlots:
+    """Request spacing for hosts every worker calls (the ATS APIs), kept in the queue file so it holds across workers."""
+
+    def __init__(self, path=WORK_QUEUE_FILE, hosts=None):
+        self.hosts = hosts
+        # reserve() runs in worker threads, one at a time
+        self._db = sqlite3.connect(str(path), timeout=60, isolation_level=None, check_same_thread=False)
+        self._db.execute("CREATE TABLE IF NOT EXISTS host_slots (host TEXT PRIMARY KEY, next_at REAL)")
+        self._lock = threading.Lock()
+
+    def shares(self, host):
+        """True for hosts spaced here: ``hosts``, else the hosts of ATS_API_BASES."""
+        hosts = self.hosts if self.hosts is not None else {urlparse(base).netloc for base in ATS_API_BASES.values()}
+        return host in hosts
+
+    def reserve(self, host, spacing):
+        """Claim host's next slot, ``spacing`` seconds after the last one any worker claimed; returns seconds to sleep."""
+        with self._lock:
+            now = time.time()
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._db.execute("SELECT next_at FROM host_slots WHERE host = ?", (host,)).fetchone()
+                start = max(now, row[0] if row else 0.0)
+                self._db.execute("INSERT OR REPLACE INTO host_slots VALUES (?, ?)", (host, start + spacing))
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            return start - now
+
+    def close(self):
+        self._db.close()
+
+def worker_state_path(worker, state_dir=WORKER_STATE_DIR):
+    return Path(state_dir) / f"{worker}.sqlite"
+
+async def _crawl_leased(queue, worker, shards, state, **crawl_kwargs):
+    """crawl_roots_async over the leased shards while a heartbeat keeps their leases alive."""
+    domains = [domain for domain, _, _ in shards]
+
+    async def heartbeat():
+        while True:
+            await asyncio.sleep(queue.lease_seconds / 3)
+            lost = set(domains) - set(queue.renew(worker, domains))
+            if lost:
+                # expired while we were stalled; another worker may have it now, it merges whichever completes
+                logger.warning(f"Worker {worker} lost its lease on {sorted(lost)}")
+
+    beat = asyncio.create_task(heartbeat())
+    try:
+        return await crawl_roots_async([r for _, roots, _ in shards for r in roots], state, **crawl_kwargs)
+    finally:
+        beat.cancel()
+
+def run_worker(worker=None, queue_path=WORK_QUEUE_FILE, state_dir=WORKER_STATE_DIR, main_state_path=STATE_DB_FILE,
+               parse_workers=PARSE_WORKERS, root_concurrency=ROOT_CONCURRENCY, offline=False, archive_dir=None):
+    """Lease shards from the queue at queue_path and crawl them until none are left; returns jobs found.
+
+    Results go to the worker's own store under state_dir for the coordinator to merge.
+    """
+    worker = worker or f"{socket.gethostname()}-{os.getpid()}"
+    cache = open_http_cache(offline=offline)
+    Path(state_dir).mkdir(parents=True, exist_ok=True)
+    queue = WorkQueue(queue_path)
+    # company roots may embed a board served by the same ATS API host as other workers' roots
+    shared_slots = SharedHostSlots(queue_path)
+    state = CrawlStateStore(path=worker_state_path(worker, state_dir), legacy_path=None)
+    archive = PageArchive(archive_dir) if archive_dir else None
+    job_count = 0
+    try:
+        while True:
+            shards = queue.lease(worker)
+            if not shards:
+                if not queue.remaining():
+                    break
+                # the rest is leased elsewhere; wait in case a lease expires
+                time.sleep(QUEUE_POLL_SECONDS)
+                continue
+            roots = [r for _, rs, _ in shards for r in rs]
+            logger.info(f"Worker {worker} leased {[d for d, _, _ in shards]}")
+            state.import_roots(main_state_path, roots, completed=False)
+            job_count += asyncio.run(_crawl_leased(
+                queue, worker, shards, state, root_concurrency=root_concurrency, parse_workers=parse_workers,
+                metrics_file=METRICS_FILE.with_name(f"{METRICS_FILE.stem}.{worker}{METRICS_FILE.suffix}"),
+                archive=archive, shared_slots=shared_slots,
+            ))
+            state.commit()
+            for domain, rs, _ in shards:
+                if all(state.is_root_completed(r) for r in rs):
+                    queue.complete(worker, domain)
+                else:
+                    queue.release(worker, domain)
+    finally:
+        state.close()
+        shared_slots.close()
+        queue.close()
+        if archive is not None:
+            archive.close()
+        logger.info(f"Worker {worker} HTTP cache: {cache.stats}")
+        close_http_cache()
+    logger.info(f"Worker {worker} finished: {job_count} jobs")
+    return job_count
+
+def merge_finished_shards(queue, state, state_dir=WORKER_STATE_DIR, sinks=()):
+    """Fold completed shards from the worker stores into state and the sinks; returns jobs merged."""
+    merged = 0
+    for domain, roots, worker, leased_at in queue.done():
+        if state.is_root_completed(roots[0]):
+            # merged into state before a crash cut off mark_merged; main re-exported its jobs
+            queue.mark_merged(domain)
+            continue
+        # only jobs crawled under this lease; the rest were seeded from state and are already there
+        jobs = state.import_roots(worker_state_path(worker, state_dir), roots, since=leased_at)
+        for job in jobs:
+            if state.fold_duplicate(job):
+                # the same requisition was crawled under another shard first
+                metrics.inc("crawler_duplicate_jobs_total")
+                continue
+            for sink in sinks:
+                sink.write(job)
+            merged += 1
+        if sinks:
+            for job in state.unchanged_jobs(roots, leased_at):
+                for sink in sinks:
+                    sink.write(job)
+                merged += 1
+        state.commit()
+        queue.mark_merged(domain)
+    return merged
+
+def run_coordinator(careers_list, state, workers, queue_path=WORK_QUEUE_FILE, state_dir=WORKER_STATE_DIR,
+                    sinks=(), fresh=False, parse_workers=PARSE_WORKERS, root_concurrency=ROOT_CONCURRENCY,
+                    offline=False, archive_dir=None):
+    """Shard careers_list into the queue, run ``workers`` local worker processes and merge their results.
+
+    Resumes a queue left by an interrupted run unless ``fresh``; returns the number of jobs merged.
+    """
+    queue = WorkQueue(queue_path)
+    if fresh or not queue.remaining() and not queue.done():
+        queue.reset()
+        shutil.rmtree(state_dir, ignore_errors=True)
+    Path(state_dir).mkdir(parents=True, exist_ok=True)
+    queue.fill([root for root in careers_list if not state.is_root_completed(root)])
+    state.commit()  # workers seed from the committed main store
+    logger.info(f"Work queue: {queue.counts()}")
+
+    ctx = multiprocessing.get_context("spawn")
+    procs = [
+        ctx.Process(target=run_worker, name=f"crawl-worker-{i}",
+                    args=(f"{socket.gethostname()}-w{i}", queue_path, state_dir, state.path,
+                          parse_workers, root_concurrency, offline, archive_dir))
+        for i in range(workers)
+    ]
+    for proc in procs:
+        proc.start()
+    job_count = 0
+    try:
+        while any(proc.is_alive() for proc in procs):
+            job_count += merge_finished_shards(queue, state, state_dir, sinks)
+            time.sleep(QUEUE_POLL_SECONDS)
+    finally:
+        for proc in procs:
+            proc.join()
+        job_count += merge_finished_shards(queue, state, state_dir, sinks)
+    counts = queue.counts()
+    unfinished = sum(n for s, n in counts.items() if s not in ("merged", "done"))
+    if unfinished:
+        logger.warning(f"{unfinished} shards not finished ({counts}); run again to resume them")
+    queue.close()
+    return job_count
+
+# -----------------------------
+# Main orchestration
+# -----------------------------
+async def crawl_roots_async(careers_list, state, root_concurrency=ROOT_CONCURRENCY,
+                            parse_workers=PARSE_WORKERS, parse_queue_size=PARSE_QUEUE_SIZE, sinks=(),
+                            metrics_port=METRICS_PORT, metrics_file=METRICS_FILE, archive=None, shared_slots=None):
+    """Crawl many careers roots at once on a shared engine; returns the number of jobs found.
+
+    Fetching runs on the event loop; parsing runs in a process pool fed through a
+    bounded queue of ``parse_queue_size`` pages. Each job is stored and written to
+    every sink as soon as it is parsed, so nothing accumulates in memory.
+    Metrics are served on ``metrics_port`` while the crawl runs (if set) and
+    written to ``metrics_file`` after every root. Fetched pages go to
+    ``archive`` (a PageArchive) when given. ``shared_slots`` is passed to the engine.
+    """
+    job_count = 0
+    root_sem = asyncio.Semaphore(root_concurrency)
+    frontier = UrlFrontier(store=state)
+    routes = state.get_meta("fetch_routes", {})
+    # when each unfinished root's crawl began, so a resumed root does not close jobs seen before the crash
+    root_started = state.get_meta("root_started", {})
+    state.set_meta("root_started", root_started)
+    # start of the last completed crawl per root; sitemap entries not modified since are skipped
+    sitemap_checked = state.get_meta("sitemap_checked", {})
+    state.set_meta("sitemap_checked", sitemap_checked)
+    # worker stores have no generation of their own; they write no sinks either
+    generation = state.get_meta("generation_started", float("inf"))
+
+    async def crawl_root(root, engine, parse_stage):
+        nonlocal job_count
+
+        def on_job(job):
+            nonlocal job_count
+            # tag company domain; persisted in the same batch as the URL that produced it
+            job["company_root"] = root
+            job_url, first_seen = state.fingerprints.observe(job)
+            if job_url != canonicalize_url(job["url"]):
+                # near-duplicate of a job we already have: fold it in, don't count it twice
+                state.merge_duplicate(job_url, job["url"])
+                metrics.inc("crawler_duplicate_jobs_total")
+                return
+            job["first_seen"] = datetime.fromtimestamp(first_seen, timezone.utc).isoformat()
+            previous = state.add_job(job)
+            if previous is not None and previous >= generation:
+                # committed by an interrupted run before its page was marked done; main re-exported it
+                return
+            for sink in sinks:
+                sink.write(job)
+            job_count += 1
+            metrics.inc("crawler_jobs_total")
+
+        async with root_sem:
+            metrics.add_gauge("crawler_roots_in_progress", 1)
+            try:
+                started = root_started.setdefault(root, time.time())
+                _, complete = await crawl_careers_page_async(
+                    root, engine, parse_stage=parse_stage, frontier=frontier, on_job=on_job,
+                    fingerprints=state.fingerprints, sitemap_since=sitemap_checked.get(root), archive=archive)
+                if complete:
+                    closed = state.fingerprints.close_missing(root, started)
+                    if closed:
+                        logger.info(f"Marked {closed} jobs under {root} as closed")
+                else:
+                    # jobs not seen may only have been out of reach this time
+                    logger.info(f"Partial crawl of {root}; not closing jobs it did not see")
+                if sinks:
+                    # skipped as unchanged, but still part of this crawl's output
+                    for job in state.unchanged_jobs([root], started):
+                        for sink in sinks:
+                            sink.write(job)
+                        job_count += 1
+                state.mark_root_completed(root)
+                sitemap_checked[root] = root_started.pop(root, started)
+                state.set_meta("fetch_routes", routes)
+                save_state(state)
+            except RootUnavailable as e:
+                # left pending with its jobs untouched; the next run retries it
+                logger.warning(f"Skipped {root} for now: {e}")
+            except Exception as e:
+                logger.exception(f"Error crawling {root}: {e}")
+            finally:
+                metrics.add_gauge("crawler_roots_in_progress", -1)
+                if metrics_file:
+                    metrics.write(metrics_file)
+
+    pending = []
+    seen_roots = set()
+    for root in careers_list:
+        if state.is_root_completed(root):
+            logger.info(f"Skipping already processed {root}")
+            continue
+        if canonicalize_url(root) in seen_roots:
+            logger.info(f"Skipping duplicate root {root}")
+            continue
+        seen_roots.add(canonicalize_url(root))
+        pending.append(root)
+    server = await metrics.serve(metrics_port) if metrics_port else None
+    try:
+        async with AsyncFetchEngine(router=FetchRouter(routes), shared_slots=shared_slots) as engine, \
+                ParseStage(workers=parse_workers, queue_size=parse_queue_size) as parse_stage:
+            await asyncio.gather(*(crawl_root(root, engine, parse_stage) for root in pending))
+    finally:
+        if server is not None:
+            await server.cleanup()
+        if metrics_file:
+            metrics.write(metrics_file)
+    return job_count
+
+def log_metrics_summary(summary):
+    """Log the end-of-run breakdown: where the time went and which hosts were busiest or failing."""
+    for stage, s in sorted(summary["stages"].items(), key=lambda kv: -kv[1]["total_s"]):
+        logger.info(f"stage {stage:<16} n={s['count']:<7} total={s['total_s']:.1f}s "
+                    f"mean={s['mean_ms']:.1f}ms p95<={s['p95_le_s']}s")
+    for host, counts in summary["hosts"].items():
+        codes = {k.split(":", 1)[1]: v for k, v in counts.items() if k.startswith("crawler_host_responses_total:")}
+        logger.info(f"host {host}: requests={counts.get('crawler_host_requests_total', 0)} codes={codes} "
+                    f"retries={counts.get('crawler_host_retries_total', 0)} "
+                    f"renders={counts.get('crawler_host_renders_total', 0)} "
+                    f"parse_failures={counts.get('crawler_host_parse_failures_total', 0)}")
+
+def main(careers_list, use_playwright=False, root_concurrency=ROOT_CONCURRENCY, offline=False,
+         parse_workers=PARSE_WORKERS, parse_queue_size=PARSE_QUEUE_SIZE, output_formats=OUTPUT_FORMATS,
+         recrawl=False, metrics_port=METRICS_PORT, workers=0, archive_pages=ARCHIVE_PAGES):
+    """Crawl careers_list, streaming jobs to ``output_formats`` sinks, and write analytics.
+
+    ``offline=True`` replays pages from the HTTP cache. ``recrawl=True`` starts a
+    new crawl generation (and new job files) instead of resuming the last one. ``metrics_port``
+    serves Prometheus metrics during the run; they are also written to METRICS_FILE.
+    ``workers=N`` shards the roots into WORK_QUEUE_FILE and crawls them in N
+    worker processes (see run_coordinator); parse_workers is split between them.
+    A resumed run rewrites the job files from the jobs the state store has committed
+    for this generation, then adds the rest as it crawls them.
+    ``archive_pages=True`` keeps every fetched page in ARCHIVE_DIR for reextract().
+    """
+    state = load_state()
+    if recrawl:
+        state.new_crawl()
+    if state.get_meta("generation_started") is None:
+        state.set_meta("generation_started", time.time())
+    cache = open_http_cache(offline=offline)
+    # the job files only ever hold committed jobs: rebuild them from state rather than trusting what is on disk
+    sinks = open_job_sinks(output_formats)
+    if not recrawl:
+        resumed = 0
+        for job in state.generation_jobs(state.get_meta("generation_started")):
+            for sink in sinks:
+                sink.write(job)
+            resumed += 1
+        if resumed:
+            logger.info(f"Resuming with {resumed} jobs already crawled")
+    archive = PageArchive(ARCHIVE_DIR) if archive_pages and not workers else None
+    try:
+        if workers:
+            job_count = run_coordinator(careers_list, state, workers, sinks=sinks, fresh=recrawl,
+                                        parse_workers=max(1, parse_workers // workers),
+                                        root_concurrency=root_concurrency, offline=offline,
+                                        archive_dir=ARCHIVE_DIR if archive_pages else None)
+        else:
+            job_count = asyncio.run(crawl_roots_async(
+                careers_list, state, root_concurrency=root_concurrency,
+                parse_workers=parse_workers, parse_queue_size=parse_queue_size, sinks=sinks,
+                metrics_port=metrics_port, archive=archive,
+            ))
+    finally:
+        for sink in sinks:
+            sink.close()
+        if archive is not None:
+            logger.info(f"Page archive: {archive.stats()}")
+            archive.close()
+        close_http_cache()
+    state.commit()
+    logger.info(f"HTTP cache: {cache.stats}")
+    run_metrics = metrics.summary()
+    log_metrics_summary(run_metrics)
 
-    analytics = compute_analytics(aggregated_jobs)
-    OUTPUT_FILE.write_text(json.dumps({"jobs": aggregated_jobs, "analytics": analytics}, indent=2))
-    logger.info(f"Wrote analytics to {OUTPUT_FILE}")
-    return {"jobs": aggregated_jobs, "analytics": analytics}
+    # analytics over every stored job (incl. roots skipped this run), kept incrementally
+    partials = state.analytics()
+    analytics = partials.total().summary()
+    analytics["by_company"] = partials.by_company()
+    state.close()
+    OUTPUT_FILE.write_text(json.dumps({"analytics": analytics}, indent=2))
+    logger.info(f"Wrote {job_count} jobs to {[str(s.path) for s in sinks]} and analytics to {OUTPUT_FILE}")
+    return {"jobs_written": job_count, "outputs": [str(s.path) for s in sinks], "analytics": analytics,
+            "metrics": run_metrics}
 
 # -----------------------------
 # Run
 # -----------------------------
 if __name__ == "__main__":
+    if sys.argv[1:2] == ["worker"]:
+        # another node joining a distributed crawl: python script.py worker [worker-id]
+        run_worker(sys.argv[2] if len(sys.argv) > 2 else None)
+        sys.exit(0)
+    if sys.argv[1:2] == ["reextract"]:
+        # re-parse archived pages with the current heuristics: python script.py reextract [archive_dir]
+        results = reextract(Path(sys.argv[2]) if len(sys.argv) > 2 else ARCHIVE_DIR)
+        print("Total jobs:", results["jobs_written"])
+        sys.exit(0)
     # Example run: set use_playwright=True if you expect many JS heavy pages.
     results = main(CAREERS_PAGES_LINKS, use_playwright=True)
-    print("Total jobs:", len(results["jobs"]))
+    print("Total jobs:", results["jobs_written"])
     print("Top backend hits:", results["analytics"]["by_backend"])